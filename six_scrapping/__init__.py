@@ -0,0 +1 @@
+"""Instagram follower/post scrapers and GPT-based interest analysis"""
@@ -0,0 +1,118 @@
+import argparse
+from collections import Counter
+from psycopg2.extras import execute_values
+from six_scrapping.interest import connect_to_db
+
+# Instagram's own profile category is a cheap, reliable label for business and creator accounts
+SEED_FROM_PROFILES_QUERY = """
+    INSERT INTO account_interests (username, categories, source, updated_at)
+    SELECT u.username, ARRAY[d.category_name], 'profile', now()
+    FROM user_detail d
+    JOIN user_data u ON u.pk = d.pk
+    WHERE d.category_name IS NOT NULL AND d.category_name <> ''
+    ON CONFLICT (username) DO UPDATE
+    SET categories = EXCLUDED.categories, source = 'profile', updated_at = now()
+"""
+
+
+class AccountIndex:
+    """Followee username -> interest categories, kept in the account_interests table.
+
+    Accounts classified with an empty list (friends, personal profiles) are
+    still stored so they are never sent to the model again.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, usernames):
+        """Split usernames into ({known username: categories}, [unknown usernames])"""
+        if not usernames:
+            return {}, []
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT username, categories FROM account_interests WHERE username = ANY(%s)",
+            (list(usernames),)
+        )
+        known = dict(cursor.fetchall())
+        cursor.close()
+
+        unknown = [u for u in usernames if u not in known]
+        self.hits += len(usernames) - len(unknown)
+        self.misses += len(unknown)
+        return known, unknown
+
+    def record(self, classifications, source="llm"):
+        """Upsert {username: [categories]}; profile categories are never overwritten by LLM guesses"""
+        if not classifications:
+            return
+        cursor = self.conn.cursor()
+        try:
+            execute_values(
+                cursor,
+                "INSERT INTO account_interests (username, categories, source, updated_at) VALUES %s "
+                "ON CONFLICT (username) DO UPDATE "
+                "SET categories = EXCLUDED.categories, source = EXCLUDED.source, updated_at = now() "
+                "WHERE account_interests.source <> 'profile' OR EXCLUDED.source = 'profile'",
+                [(username, categories, source) for username, categories in classifications.items()],
+                template="(%s, %s, %s, now())"
+            )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def report(self):
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0
+        return (f"[Info] - Account index: {self.hits} of {lookups} followed accounts resolved locally "
+                f"({rate:.0f}% hit rate)")
+
+
+def summarize_categories(classifications):
+    """Turn {username: [categories]} into 'category (n accounts)' lines, most common first"""
+    counts = Counter(c.lower() for categories in classifications.values() for c in set(categories))
+    return "\n".join(f"{category} ({count} accounts)" for category, count in counts.most_common())
+
+
+def seed_from_profiles(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SEED_FROM_PROFILES_QUERY)
+        conn.commit()
+        return cursor.rowcount
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain the followed-account interest index')
+    parser.add_argument('command', choices=['seed', 'stats'],
+                        help='seed from scraped profile categories, or show index size')
+    args = parser.parse_args()
+
+    conn = connect_to_db()
+    if not conn:
+        return
+    try:
+        if args.command == 'seed':
+            print(f"[Success] - Indexed {seed_from_profiles(conn)} accounts from profile categories")
+        else:
+            cursor = conn.cursor()
+            cursor.execute("SELECT source, count(*) FROM account_interests GROUP BY source ORDER BY source")
+            for source, count in cursor.fetchall():
+                print(f"{source}: {count} accounts")
+            cursor.close()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+import os
+import json
+from dotenv import load_dotenv, find_dotenv
+import psycopg2
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from six_scrapping.interest import create_content_list, local_tags_if_low_signal
+from six_scrapping.llm_cache import get_llm_cache, cached_completion, TruncatedResponseError
+from six_scrapping.token_budget import PROMPT_TOKEN_BUDGET, count_tokens, pack_by_token_budget
+from six_scrapping.interest_store import INTEREST_RESPONSE_FORMAT, parse_account_interests, parse_interests, save_interest_tags
+from six_scrapping.account_index import AccountIndex, summarize_categories
+from six_scrapping.interest_state import get_user_pk, load_interest_state, compute_delta, save_interest_state
+
+load_dotenv(find_dotenv(usecwd=True))
+
+OPENAI_KEY = os.environ.get('OPENAI_KEY')
+DB_NAME = os.environ.get('DB_NAME', 'instagram')
+DB_USER = os.environ.get('DB_USER', 'postgres')
+DB_PASSWORD = os.environ.get('DB_PASSWORD', 'postgres')
+DB_HOST = os.environ.get('DB_HOST', 'localhost')
+DB_PORT = os.environ.get('DB_PORT', '5432')
+
+BATCH_PROMPT_TEMPLATE = """
+# BATCH PROMPT TEMPLATE
+# You can define how to refine or add to the interests based on new following list data and previous results.
+# The variables available:
+# - previous_response (from the last LLM output)
+# - current_following_batch (subset of following list)
+# Example:
+# Based on the previous result:
+{previous_response}
+
+Now here is a new batch of people/brands/pages this person follows:
+{current_following_batch}
+
+Please refine or expand the list of interests accordingly.
+Return the updated list of interests like:
+["interest1", "interest2", "interest3"]
+"""
+
+INITIAL_PROMPT = """
+You are given some data about a person's social media. Based on that you have to predict the interests, hobbies or likings of the person.
+The data is as follows:
+Posts and Captions: You can get hashtags or keywords from captions and analyse images to get interests.
+Don't be hasty about deciding interests observe if there are any trends.
+
+Return a list of the interests of the person like so:
+["interest1", "interest2", "interest3"]
+"""
+
+# Incremental runs: only the posts added since the last analysis, with its result as context
+DELTA_POSTS_PROMPT = """
+Based on their earlier posts, this person's interests were predicted as:
+{previous_response}
+
+Here are the posts and captions they uploaded since then.
+Please refine or expand the list of interests accordingly.
+Return the updated list of interests like:
+["interest1", "interest2", "interest3"]
+"""
+
+# Map step: each batch of the following list is analysed on its own
+MAP_PROMPT_TEMPLATE = """
+Here is a batch of people/brands/pages a person follows on social media:
+{current_following_batch}
+
+Based only on these accounts, predict the interests, hobbies or likings of the person.
+Ignore accounts that look like friends or personal profiles and say nothing about interests.
+
+Return a list of the interests like:
+["interest1", "interest2", "interest3"]
+"""
+
+# Reduce step: several partial lists are merged into one
+REDUCE_PROMPT_TEMPLATE = """
+Below are several lists of interests predicted for the same person, each from a different part of their social media data:
+{partial_lists}
+
+Merge them into a single list of the person's interests.
+Combine duplicates and synonyms, prefer interests supported by more than one list and drop one-off noise.
+
+Return the merged list of interests like:
+["interest1", "interest2", "interest3"]
+"""
+
+# Index step: classify each unknown followed account on its own so the answer can be reused for other users
+CLASSIFY_PROMPT_TEMPLATE = """
+Here is a list of Instagram accounts a person follows:
+{current_following_batch}
+
+For each account, give the interests that following it suggests (e.g. a football club suggests "football").
+Use an empty list for accounts that look like friends or personal profiles, or that you don't recognise.
+
+Return a JSON object mapping every username to its list of interests like:
+{{"username1": ["interest1", "interest2"], "username2": []}}
+"""
+# The answer grows with every account in the batch, so classify batches are capped by how much
+# output they need rather than by prompt size alone
+CLASSIFY_MAX_ACCOUNTS = 100
+# A 16k-token budget fits a couple of thousand usernames, which would leave mapreduce a single map call
+MAP_MAX_ACCOUNTS = 200
+CLASSIFY_MAX_TOKENS = 4096
+
+def connect_to_db():
+    try:
+        conn = psycopg2.connect(
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            port=DB_PORT
+        )
+        return conn
+    except Exception as e:
+        print(f"Error connecting to database: {str(e)}")
+        return None
+
+def get_user_data(username):
+    conn = connect_to_db()
+    if not conn:
+        return None, None, None
+
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT pk FROM user_data WHERE username = %s", (username,))
+        user_pk_result = cur.fetchone()
+
+        if not user_pk_result:
+            print(f"User '{username}' not found in the database")
+            return None, None, None
+
+        user_pk = user_pk_result[0]
+        cur.execute("SELECT post_urls, captions, following_list FROM user_detail WHERE pk = %s", (user_pk,))
+        result = cur.fetchone()
+
+        if not result:
+            print(f"No details found for user '{username}'")
+            return None, None, None
+
+        post_urls = result[0] if result[0] else []
+        captions = result[1] if result[1] else []
+        following_list = result[2] if result[2] else []
+
+        return post_urls, captions, following_list
+
+    except Exception as e:
+        print(f"Error querying database: {str(e)}")
+        return None, None, None
+    finally:
+        if conn:
+            conn.close()
+
+def batch_list(lst, batch_size=20):
+    for i in range(0, len(lst), batch_size):
+        yield lst[i:i + batch_size]
+
+def plan_batches(following_list, template, batch_size=None, token_budget=PROMPT_TOKEN_BUDGET, reserve_tokens=0,
+                 max_items=None):
+    """Split the following list into fixed-size batches, or pack each batch up to token_budget.
+
+    reserve_tokens covers text substituted into the template besides the batch
+    itself, such as the previous response in chain mode. max_items caps the
+    usernames per batch either way.
+    """
+    if batch_size:
+        return list(batch_list(following_list, batch_size=min(batch_size, max_items or batch_size)))
+    overhead = count_tokens(template) + reserve_tokens
+    return list(pack_by_token_budget(following_list, budget=token_budget, overhead_tokens=overhead,
+                                     max_items=max_items))
+
+def call_llm(client, content_list, cache=None, response_format=None, **options):
+    """Send one user message; response_format (e.g. INTEREST_RESPONSE_FORMAT) constrains the answer to a JSON schema"""
+    if response_format:
+        options["response_format"] = response_format
+    return cached_completion(
+        client,
+        [{
+            "role": "user",
+            "content": content_list
+        }],
+        model="gpt-4o",
+        cache=cache,
+        **options
+    )
+
+def chain_interests(client, previous_response, batches, cache=None, response_format=None):
+    """Refine the interests one batch at a time, each call building on the previous answer"""
+    for batch in batches:
+        prompt = BATCH_PROMPT_TEMPLATE.format(
+            previous_response=previous_response,
+            current_following_batch="\n".join(batch)
+        )
+        content = [{"type": "text", "text": prompt}]
+        previous_response = call_llm(client, content, cache, response_format)
+        print("Refined Response:", previous_response)
+        append_output_to_file(previous_response)
+    return previous_response
+
+def map_reduce_interests(client, initial_response, batches, concurrency=8, fan_in=4, cache=None,
+                         response_format=None):
+    """Analyse every batch independently, then merge the partial lists in a tree of reduce calls.
+
+    With enough concurrency the map step is a single round of calls and the
+    reduce takes log_fan_in(batches) rounds.
+    """
+    def map_batch(batch):
+        prompt = MAP_PROMPT_TEMPLATE.format(current_following_batch="\n".join(batch))
+        return call_llm(client, [{"type": "text", "text": prompt}], cache, response_format)
+
+    def reduce_group(group):
+        if len(group) == 1:
+            return group[0]
+        partial_lists = "\n\n".join(f"List {i + 1}:\n{partial}" for i, partial in enumerate(group))
+        prompt = REDUCE_PROMPT_TEMPLATE.format(partial_lists=partial_lists)
+        return call_llm(client, [{"type": "text", "text": prompt}], cache, response_format)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        partials = list(executor.map(map_batch, batches))
+        print(f"[Info] - Analysed {len(batches)} following batches")
+
+        partials = [initial_response] + partials
+        level = 0
+        while len(partials) > 1:
+            groups = [partials[i:i + fan_in] for i in range(0, len(partials), fan_in)]
+            partials = list(executor.map(reduce_group, groups))
+            level += 1
+            print(f"[Info] - Reduce level {level}: {len(partials)} lists remaining")
+
+    append_output_to_file(partials[0])
+    return partials[0]
+
+def indexed_interests(client, initial_response, following_list, index, args, cache=None, response_format=None):
+    """Resolve followed accounts from the account index and only classify the unknown ones.
+
+    New classifications are written back to the index, then a single reduce
+    call merges the post-based interests with the followed-account summary.
+    """
+    known, unknown = index.lookup(following_list)
+    print(f"[Info] - {len(known)} followed accounts already indexed, {len(unknown)} to classify")
+
+    def classify_batch(batch):
+        prompt = CLASSIFY_PROMPT_TEMPLATE.format(current_following_batch="\n".join(batch))
+        try:
+            response = call_llm(client, [{"type": "text", "text": prompt}], cache, {"type": "json_object"},
+                                max_tokens=CLASSIFY_MAX_TOKENS, allow_truncated=False)
+        except TruncatedResponseError as e:
+            # A cut-off object would parse as an empty mapping; retry in halves instead
+            if len(batch) == 1:
+                print(f"[Error] - Could not classify {batch[0]}: {e}")
+                return {}
+            print(f"[Warning] - Classification of {len(batch)} accounts was cut off, splitting the batch")
+            half = len(batch) // 2
+            return dict(classify_batch(batch[:half]), **classify_batch(batch[half:]))
+        classified = parse_account_interests(response)
+        # Only keep usernames we asked about; the model sometimes invents or renames keys
+        return {u: classified[u] for u in batch if u in classified}
+
+    batches = plan_batches(unknown, CLASSIFY_PROMPT_TEMPLATE, args.batch_size, args.token_budget,
+                           reserve_tokens=args.response_reserve, max_items=CLASSIFY_MAX_ACCOUNTS)
+    classifications = dict(known)
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        for classified in executor.map(classify_batch, batches):
+            index.record(classified)
+            classifications.update(classified)
+
+    summary = summarize_categories(classifications)
+    if not summary:
+        return initial_response
+
+    partial_lists = f"List 1:\n{initial_response}\n\nList 2 (interests of followed accounts):\n{summary}"
+    prompt = REDUCE_PROMPT_TEMPLATE.format(partial_lists=partial_lists)
+    final_response = call_llm(client, [{"type": "text", "text": prompt}], cache, response_format)
+    append_output_to_file(final_response)
+    return final_response
+
+def append_output_to_file(output, file_path="llm_outputs.txt"):
+    with open(file_path, "a", encoding="utf-8") as f:
+        f.write(output)
+        f.write("\n" + "="*80 + "\n")
+
+def save_result(args, conn, user_pk, username, state, img_urls, following_list, response, interests):
+    """Write the analysis to interest_state (--incremental) and to interest_tags and the interests tables (--save)"""
+    if user_pk is None:
+        return
+    if args.incremental:
+        save_interest_state(conn, user_pk, state, img_urls, following_list, response)
+    if args.save:
+        save_interest_tags(conn, [(user_pk, interests)])
+        print(f"[Success] - Saved interests for {username}")
+
+def save_local_tags(args, conn, username, img_urls, following_list, local_tags):
+    """Store tags from the caption pre-pass the same way an LLM answer would be stored"""
+    if conn is None:
+        return
+    user_pk = get_user_pk(conn, username)
+    state = load_interest_state(conn, user_pk) if args.incremental else None
+    save_result(args, conn, user_pk, username, state, img_urls, following_list, json.dumps(local_tags), local_tags)
+
+def analyse_user(args, conn, username, img_urls, captions, following_list):
+    """Run the post call and the following-list calls for one user and return the final interests"""
+    from openai import OpenAI
+    client = OpenAI(api_key=OPENAI_KEY)
+    cache = None if args.no_cache else get_llm_cache()
+    # Answers that end up in the database are constrained to the interest JSON schema
+    response_format = INTEREST_RESPONSE_FORMAT if args.save else None
+
+    # Incremental runs only send posts and followed accounts the stored analysis hasn't seen
+    state, user_pk = None, None
+    new_urls, new_captions, new_following = img_urls, captions, following_list
+    if conn is not None:
+        user_pk = get_user_pk(conn, username)
+    if args.incremental:
+        state = load_interest_state(conn, user_pk)
+        new_urls, new_captions, new_following = compute_delta(state, img_urls, captions, following_list)
+        if state:
+            print(f"[Info] - Last analysed {state['analyzed_at']}: {len(new_urls)} new posts, "
+                  f"{len(new_following)} new followed accounts")
+            if not new_urls and not new_following:
+                print("Stored Response:", state["interests"])
+                return state["interests"]
+
+    # First Call: Captions + Images
+    if state and not new_urls:
+        previous_response = state["interests"]
+    else:
+        if state:
+            content_list = [{"type": "text", "text": DELTA_POSTS_PROMPT.format(previous_response=state["interests"])}]
+        else:
+            content_list = [{"type": "text", "text": INITIAL_PROMPT}]
+        content_list += create_content_list(new_urls, new_captions, compact=args.caption_prepass, owner=username)
+        previous_response = call_llm(client, content_list, cache, response_format)
+        print("Initial Response:", previous_response)
+        append_output_to_file(previous_response)
+
+    # Follow-up Calls: Batching Following List
+    if args.use_index:
+        index = AccountIndex(conn)
+        final_response = indexed_interests(client, previous_response, new_following, index, args, cache,
+                                           response_format)
+        print("Merged Response:", final_response)
+        print(index.report())
+    elif args.mode == 'mapreduce':
+        batches = plan_batches(new_following, MAP_PROMPT_TEMPLATE, args.batch_size, args.token_budget,
+                               max_items=args.map_batch_users)
+        print(f"[Info] - Split {len(new_following)} followed accounts into {len(batches)} batches")
+        final_response = map_reduce_interests(
+            client, previous_response, batches,
+            concurrency=args.concurrency, fan_in=max(2, args.fan_in), cache=cache,
+            response_format=response_format
+        )
+        print("Merged Response:", final_response)
+    else:
+        batches = plan_batches(new_following, BATCH_PROMPT_TEMPLATE, args.batch_size, args.token_budget,
+                               reserve_tokens=args.response_reserve)
+        print(f"[Info] - Split {len(new_following)} followed accounts into {len(batches)} batches")
+        final_response = chain_interests(client, previous_response, batches, cache=cache,
+                                         response_format=response_format)
+
+    interests = parse_interests(final_response) if args.save else None
+    if args.save and interests is None:
+        # Neither the tags nor the incremental state are written, so the next run redoes this user
+        print(f"[Error] - Not saving interests for {username}: reply didn't match the interest schema")
+    else:
+        save_result(args, conn, user_pk, username, state, img_urls, following_list, final_response, interests)
+
+    if cache is not None:
+        print(cache.report())
+    return final_response
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Predict a user\'s interests, refining them over batches of the following list')
+    parser.add_argument('username', help='Instagram username to analyse')
+    parser.add_argument('--no-cache', action='store_true', help='Always call the API instead of reusing cached responses')
+    parser.add_argument('--mode', choices=['chain', 'mapreduce'], default='chain',
+                        help='chain refines batch after batch; mapreduce analyses batches concurrently and merges them')
+    parser.add_argument('--concurrency', type=int, default=8, help='Maximum concurrent LLM calls in mapreduce mode')
+    parser.add_argument('--fan-in', type=int, default=4, help='Partial lists merged per reduce call in mapreduce mode')
+    parser.add_argument('--map-batch-users', type=int, default=MAP_MAX_ACCOUNTS,
+                        help='Most usernames per map call in mapreduce mode, so large lists fan out over several calls')
+    parser.add_argument('--batch-size', type=int,
+                        help='Fixed number of usernames per call (default: pack batches up to --token-budget)')
+    parser.add_argument('--token-budget', type=int, default=PROMPT_TOKEN_BUDGET,
+                        help='Maximum prompt tokens per following-list call')
+    parser.add_argument('--response-reserve', type=int, default=1024,
+                        help='Tokens kept free for the previous response in chain mode')
+    parser.add_argument('--caption-prepass', action='store_true',
+                        help='Send a hashtag/keyword summary instead of raw captions, and tag low-signal users locally')
+    parser.add_argument('--use-index', action='store_true',
+                        help='Resolve followed accounts from the account_interests index and only send unknown ones')
+    parser.add_argument('--save', action='store_true',
+                        help='Ask for schema-constrained JSON and save the result to interest_tags and the interests tables')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only send posts and followed accounts added since the last --incremental run')
+    args = parser.parse_args(argv)
+
+    username = args.username
+    img_urls, captions, following_list = get_user_data(username)
+
+    if not img_urls or not captions:
+        print(f"Could not retrieve data for username '{username}'")
+        sys.exit(1)
+
+    conn = None
+    if args.use_index or args.incremental or args.save:
+        conn = connect_to_db()
+        if not conn:
+            sys.exit(1)
+
+    try:
+        if args.caption_prepass:
+            local_tags = local_tags_if_low_signal(img_urls, captions, following_list)
+            if local_tags is not None:
+                print("[Info] - Low-signal user, tagged from captions without an LLM call")
+                print(local_tags)
+                append_output_to_file(str(local_tags))
+                save_local_tags(args, conn, username, img_urls, following_list, local_tags)
+                return
+        analyse_user(args, conn, username, img_urls, captions, following_list)
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+import os
+import json
+import time
+import random
+import argparse
+from datetime import date, timedelta
+import psycopg2
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv, find_dotenv
+from tabulate import tabulate
+
+load_dotenv(find_dotenv(usecwd=True))
+
+# The benchmark drops and recreates this database for every scale, so it must never be the real one
+BENCH_DB_NAME = os.environ.get('BENCH_DB_NAME', 'instagram_bench')
+DB_NAME = os.environ.get('DB_NAME', 'instagram')
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'create_db.sql')
+TABLES = ["user_data", "user_detail", "mutual_follows"]
+
+# Average follower + following list length per scraped user; sets how many users a scale has
+EDGES_PER_USER = 400
+# Share of a user's following list that follows them back, so the trigger finds mutuals
+RECIPROCITY = 0.3
+
+
+def parse_scale(text):
+    """'10k' -> 10000, '1m' -> 1000000"""
+    text = text.lower().strip()
+    multiplier = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def db_config(database):
+    return {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': database,
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', 'postgres'),
+        'port': os.getenv('DB_PORT', '5432')
+    }
+
+
+class SyntheticGraph:
+    """An Instagram-like follow graph with power-law follower counts, generated lazily and repeatably.
+
+    Scraped users are acct_0 .. acct_{users-1}; their lists draw from a pool of
+    accounts where low indices are far more popular, like real follow graphs.
+    The same seed always gives the same graph, user by user.
+    """
+
+    def __init__(self, edges, seed=0):
+        self.edges = edges
+        self.seed = seed
+        self.users = max(50, edges // EDGES_PER_USER)
+        self.pool = max(1000, edges // 20)
+
+        rng = random.Random(seed)
+        # Pareto follower counts (a few huge accounts, a long tail), lognormal following counts
+        followers = [rng.paretovariate(1.2) for _ in range(self.users)]
+        following = [rng.lognormvariate(0, 0.8) for _ in range(self.users)]
+        cap = self.pool // 4
+        follower_scale = 0.6 * edges / sum(followers)
+        following_scale = 0.4 * edges / sum(following)
+        self.follower_sizes = [max(1, min(cap, int(f * follower_scale))) for f in followers]
+        self.following_sizes = [max(1, min(cap, int(f * following_scale))) for f in following]
+
+    def username(self, index):
+        return f"acct_{index}"
+
+    def pick(self, rng, size, exclude):
+        """size distinct popular-skewed account names, never the user themselves"""
+        picked = set()
+        while len(picked) < size:
+            index = int(self.pool * rng.random() ** 2.5)
+            if index != exclude:
+                picked.add(self.username(index))
+        return picked
+
+    def lists(self, index, extra=0):
+        """(followers_list, following_list) of scraped user index; extra adds that many newly seen names"""
+        rng = random.Random(self.seed * 1000003 + index)
+        followers = self.pick(rng, self.follower_sizes[index], index)
+        mutual = rng.sample(sorted(followers), min(len(followers), int(self.following_sizes[index] * RECIPROCITY)))
+        following = set(mutual) | self.pick(rng, self.following_sizes[index] - len(mutual), index)
+        if extra:
+            extra_rng = random.Random(f"{self.seed}-{index}-rescrape")
+            followers |= {f"new_{extra_rng.getrandbits(48):x}" for _ in range(extra)}
+            following |= {f"new_{extra_rng.getrandbits(48):x}" for _ in range(extra)}
+        return list(followers), list(following)
+
+    def posts(self, index, count=12):
+        rng = random.Random(self.seed * 7919 + index)
+        return [{
+            "url": f"https://www.instagram.com/p/{rng.getrandbits(40):x}/",
+            "image_url": f"https://scontent.cdninstagram.com/v/{rng.getrandbits(64):x}.jpg?oh={rng.getrandbits(32):x}",
+            "caption": " ".join(f"#{rng.choice(['travel', 'food', 'gym', 'art', 'music', 'coffee'])}" for _ in range(4)),
+            "likes": str(rng.randrange(5000)),
+            "posted_date": (date(2024, 1, 1) + timedelta(days=rng.randrange(600))).isoformat()
+        } for _ in range(count)]
+
+
+def split_sql(script):
+    """Split a SQL script into statements, keeping $$ function bodies and -- comments intact"""
+    statements, current, in_dollar, i = [], [], False, 0
+    while i < len(script):
+        if not in_dollar and script.startswith("--", i):
+            end = script.find("\n", i)
+            i = len(script) if end < 0 else end + 1
+            continue
+        if script.startswith("$$", i):
+            in_dollar = not in_dollar
+            current.append("$$")
+            i += 2
+            continue
+        if script[i] == ";" and not in_dollar:
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(script[i])
+        i += 1
+    if "".join(current).strip():
+        statements.append("".join(current).strip())
+    return statements
+
+
+def create_bench_db(name):
+    """Drop and recreate the bench database and load create_db.sql into it"""
+    if name == DB_NAME:
+        raise ValueError(f"Refusing to recreate {name}: it is the DB_NAME database")
+
+    admin = psycopg2.connect(**db_config('postgres'))
+    admin.autocommit = True
+    cursor = admin.cursor()
+    cursor.execute(f'DROP DATABASE IF EXISTS "{name}"')
+    cursor.execute(f'CREATE DATABASE "{name}"')
+    cursor.close()
+    admin.close()
+
+    conn = psycopg2.connect(**db_config(name))
+    conn.autocommit = True
+    cursor = conn.cursor()
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        statements = split_sql(f.read())
+    for statement in statements:
+        try:
+            cursor.execute(statement)
+        except psycopg2.Error as e:
+            # Like psql, carry on: create_db.sql re-adds a constraint that CREATE TABLE already made
+            print(f"[Warning] - Schema statement failed: {e.pgerror.strip() if e.pgerror else e}")
+    cursor.close()
+    conn.autocommit = False
+    return conn
+
+
+def load_graph(conn, graph, batch_users=200):
+    """Insert every scraped user and their lists, with both triggers on.
+
+    Returns (seconds taken, {username: pk}, edges actually written).
+    """
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    rows = execute_values(
+        cursor,
+        "INSERT INTO user_data (username) VALUES %s RETURNING pk, username",
+        [(graph.username(i),) for i in range(graph.users)],
+        fetch=True, page_size=1000
+    )
+    pks = {username: pk for pk, username in rows}
+    conn.commit()
+
+    batch, edge_count = [], 0
+    for index in range(graph.users):
+        followers, following = graph.lists(index)
+        edge_count += len(followers) + len(following)
+        batch.append((pks[graph.username(index)], followers, following, graph.follower_sizes[index],
+                      graph.following_sizes[index]))
+        if len(batch) >= batch_users or index == graph.users - 1:
+            execute_values(
+                cursor,
+                "INSERT INTO user_detail (pk, followers_list, following_list, follower_count, following_count) VALUES %s",
+                batch, page_size=batch_users
+            )
+            conn.commit()
+            batch = []
+    elapsed = time.perf_counter() - start
+    cursor.close()
+    return elapsed, pks, edge_count
+
+
+def time_calls(fn, args_list):
+    timings = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def set_mutual_trigger(conn, enabled):
+    cursor = conn.cursor()
+    cursor.execute(f"ALTER TABLE user_detail {'ENABLE' if enabled else 'DISABLE'} TRIGGER update_mutual_follows_trigger")
+    conn.commit()
+    cursor.close()
+
+
+def bench_scale(edges, args):
+    """Build the graph for one scale and time every database operation on a sample of its users"""
+    # The scrapers connect through DB_NAME themselves; point them at the bench database
+    os.environ['DB_NAME'] = args.db_name
+    from six_scrapping import follow_scraper
+    from six_scrapping import post_scraper
+    from six_scrapping.get_mutual_followers import get_mutual_followers, MUTUAL_FOLLOWERS_QUERY
+
+    graph = SyntheticGraph(edges, args.seed)
+    print(f"[Info] - Scale {edges:,} edges: {graph.users:,} scraped users, {graph.pool:,} accounts")
+    conn = create_bench_db(args.db_name)
+    load_seconds, pks, edge_count = load_graph(conn, graph)
+    print(f"[Info] - Loaded {edge_count:,} edges in {load_seconds:.1f}s ({edge_count / load_seconds:,.0f} edges/sec)")
+
+    rng = random.Random(args.seed)
+    sample = rng.sample(range(graph.users), min(args.samples, graph.users))
+    timings = {}
+
+    # update_user_lists merges a rescrape (old lists plus a few new names) into the stored arrays
+    rescrapes = [(conn, pks[graph.username(i)], *graph.lists(i, extra=5)) for i in sample]
+    timings["update_user_lists"] = time_calls(follow_scraper.update_user_lists, rescrapes)
+
+    # Trigger cost: the same no-op list update with the mutual-follows trigger on and off
+    def touch_lists(user_pk):
+        cursor = conn.cursor()
+        cursor.execute("UPDATE user_detail SET followers_list = followers_list, following_list = following_list "
+                       "WHERE pk = %s", (user_pk,))
+        conn.commit()
+        cursor.close()
+    list_updates = [(pks[graph.username(i)],) for i in sample]
+    timings["list_update_trigger_on"] = time_calls(touch_lists, list_updates)
+    set_mutual_trigger(conn, False)
+    timings["list_update_trigger_off"] = time_calls(touch_lists, list_updates)
+    set_mutual_trigger(conn, True)
+
+    # save_to_database opens its own connection per call, as it does in the scraper
+    timings["save_to_database"] = time_calls(
+        post_scraper.save_to_database, [(graph.username(i), graph.posts(i)) for i in sample]
+    )
+
+    # Mutual-follower lookups between pairs of well-followed users, where results are largest
+    popular = sorted(range(graph.users), key=lambda i: graph.follower_sizes[i], reverse=True)[:max(2, args.samples)]
+    pairs = [tuple(graph.username(i) for i in rng.sample(popular, 2)) for _ in range(args.samples)]
+
+    def run_query(username1, username2):
+        cursor = conn.cursor()
+        cursor.execute(MUTUAL_FOLLOWERS_QUERY, (username1, username2))
+        cursor.fetchall()
+        cursor.close()
+    timings["mutual_followers_query"] = time_calls(run_query, pairs)
+    timings["get_mutual_followers"] = time_calls(
+        get_mutual_followers, [(u1, u2, db_config(args.db_name)) for u1, u2 in pairs]
+    )
+
+    sizes = table_sizes(conn)
+    conn.close()
+
+    trigger_on = percentile(timings["list_update_trigger_on"], 50)
+    trigger_off = percentile(timings["list_update_trigger_off"], 50)
+    return {
+        "edges": edges,
+        "edges_written": edge_count,
+        "users": graph.users,
+        "load_seconds": load_seconds,
+        "trigger_cost_p50_ms": 1000 * (trigger_on - trigger_off),
+        "operations": {
+            name: {
+                "calls": len(values),
+                "mean_ms": 1000 * sum(values) / len(values),
+                "p50_ms": 1000 * percentile(values, 50),
+                "p95_ms": 1000 * percentile(values, 95),
+                "p99_ms": 1000 * percentile(values, 99)
+            } for name, values in timings.items() if values
+        },
+        "sizes": sizes
+    }
+
+
+def table_sizes(conn):
+    cursor = conn.cursor()
+    sizes = {}
+    for table in TABLES:
+        cursor.execute(
+            f"SELECT count(*), pg_relation_size(%s), pg_indexes_size(%s), pg_total_relation_size(%s) FROM {table}",
+            (table, table, table)
+        )
+        rows, heap, indexes, total = cursor.fetchone()
+        sizes[table] = {"rows": rows, "table_bytes": heap, "index_bytes": indexes, "total_bytes": total}
+    cursor.close()
+    return sizes
+
+
+def megabytes(value):
+    return f"{value / 1024 / 1024:.1f}"
+
+
+def report(result):
+    print(f"\n[Info] - {result['edges']:,} edges, {result['users']:,} users, "
+          f"loaded in {result['load_seconds']:.1f}s, mutual-follows trigger adds "
+          f"{result['trigger_cost_p50_ms']:.2f} ms per list update (p50)")
+    rows = [[name, op["calls"], f"{op['mean_ms']:.2f}", f"{op['p50_ms']:.2f}", f"{op['p95_ms']:.2f}",
+             f"{op['p99_ms']:.2f}"] for name, op in result["operations"].items()]
+    print(tabulate(rows, headers=["Operation", "Calls", "Mean ms", "p50 ms", "p95 ms", "p99 ms"], tablefmt="pretty"))
+    rows = [[table, f"{s['rows']:,}", megabytes(s["table_bytes"]), megabytes(s["index_bytes"]),
+             megabytes(s["total_bytes"])] for table, s in result["sizes"].items()]
+    print(tabulate(rows, headers=["Table", "Rows", "Table MB", "Index MB", "Total MB"], tablefmt="pretty"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the database layer on synthetic follow graphs of growing size')
+    parser.add_argument('--scales', nargs='+', default=['10k', '100k', '1m'],
+                        help='Edge counts to benchmark, e.g. 10k 100k 1m 10m')
+    parser.add_argument('--samples', type=int, default=200, help='Timed calls per operation at each scale')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the generated graphs')
+    parser.add_argument('--db-name', default=BENCH_DB_NAME, help='Scratch database, dropped and recreated per scale')
+    parser.add_argument('--output', help='Write all results to this JSON file')
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scales:
+        result = bench_scale(parse_scale(scale), args)
+        report(result)
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"[Info] - Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
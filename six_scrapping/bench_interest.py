@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI
+from tabulate import tabulate
+from dotenv import load_dotenv, find_dotenv
+from six_scrapping.interest import get_user_data, create_content_list, build_prompt
+from six_scrapping.image_cache import get_image_cache
+from six_scrapping.llm_cache import cached_completion
+from six_scrapping.caption_signals import load_vocab
+from six_scrapping.fake_openai import FakeOpenAIConfig, start_fake_openai
+from six_scrapping.fake_image_server import start_image_server
+
+load_dotenv(find_dotenv(usecwd=True))
+
+OPENAI_KEY = os.environ.get('OPENAI_KEY')
+
+# image_fetch covers the shipped create_content_list: download, process-pool decode/resize/encode and ImageCache
+STAGES = ["db_load", "image_fetch", "prompt_build", "llm_wait"]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def synthetic_users(count, image_urls, posts, following, seed=0):
+    """Users shaped like the user_detail rows, pointing at the local image server"""
+    rng = random.Random(seed)
+    words = list(load_vocab()) or ["travel", "coffee", "hiking"]
+    users = []
+    for i in range(count):
+        captions = [
+            " ".join(rng.sample(words, 3)) + " " + " ".join(f"#{w}" for w in rng.sample(words, 4))
+            for _ in range(posts)
+        ]
+        users.append({
+            "username": f"bench_user_{i}",
+            "post_urls": [rng.choice(image_urls) for _ in range(posts)],
+            "captions": captions,
+            "following_list": [f"account_{rng.randrange(following * 10)}" for _ in range(following)]
+        })
+    return users
+
+
+def bench_user(user, client, timings, errors):
+    """Run one user through the interest pipeline, timing each stage separately"""
+    def timed(stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[stage].append(time.perf_counter() - start)
+        return result
+
+    if "db_username" in user:
+        post_urls, captions, following_list = timed("db_load", get_user_data, user["db_username"])
+        user = dict(user, post_urls=post_urls or [], captions=captions or [], following_list=following_list or [])
+
+    images = timed("image_fetch", create_content_list, user["post_urls"], user["captions"])
+    prompt = timed("prompt_build", build_prompt, user["following_list"])
+    content = [{"type": "text", "text": prompt}] + images
+
+    try:
+        timed("llm_wait", cached_completion, client, [{"role": "user", "content": content}], "gpt-4o", None)
+    except Exception as e:
+        print(f"[Error] - LLM call failed for {user.get('username') or user.get('db_username')}: {e}")
+        errors.append(e)
+
+
+def report(timings, users, elapsed, errors):
+    total_mean = sum(sum(v) / len(v) for v in timings.values() if v) or 1
+    rows = []
+    for stage in STAGES:
+        values = timings[stage]
+        if not values:
+            continue
+        mean = sum(values) / len(values)
+        rows.append([
+            stage, f"{1000 * mean:.1f}", f"{1000 * percentile(values, 50):.1f}",
+            f"{1000 * percentile(values, 95):.1f}", f"{100 * mean / total_mean:.0f}%"
+        ])
+    print(tabulate(rows, headers=["Stage", "Mean ms", "p50 ms", "p95 ms", "Share"], tablefmt="pretty"))
+    print(f"[Info] - {users} users in {elapsed:.1f}s ({users / elapsed:.2f} users/sec)")
+    if errors:
+        print(f"[Warning] - {len(errors)} of {users} LLM calls failed; their llm_wait is not included")
+    cache = get_image_cache()
+    if cache is not None:
+        print(cache.report())
+
+
+def compare_to_baseline(timings, baseline_path, tolerance):
+    """Print stages whose mean got slower than the baseline by more than tolerance; return True if any did"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressed = False
+    for stage, values in timings.items():
+        if not values or stage not in baseline:
+            continue
+        mean = sum(values) / len(values)
+        if mean > baseline[stage] * (1 + tolerance):
+            print(f"[Regression] - {stage}: {1000 * mean:.1f} ms vs baseline {1000 * baseline[stage]:.1f} ms")
+            regressed = True
+    if not regressed:
+        print("[Info] - No stage regressed against the baseline")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time every stage of the interest pipeline against local stand-in servers')
+    parser.add_argument('--users', type=int, default=20, help='Synthetic users to run')
+    parser.add_argument('--posts', type=int, default=12, help='Posts per synthetic user')
+    parser.add_argument('--following', type=int, default=200, help='Followed accounts per synthetic user')
+    parser.add_argument('--usernames', nargs='+', help='Benchmark these database users instead (includes db_load)')
+    parser.add_argument('--image-latency', type=float, nargs=2, default=[0.02, 0.1], metavar=('MIN', 'MAX'))
+    parser.add_argument('--llm-latency', type=float, nargs=2, default=[0.2, 0.6], metavar=('MIN', 'MAX'))
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--llm-rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--base-url', help='Benchmark against this OpenAI-compatible API instead of the fake one')
+    parser.add_argument('--concurrency', type=int, default=1, help='Users benchmarked at the same time')
+    parser.add_argument('--save-baseline', help='Write the mean time of each stage to this JSON file')
+    parser.add_argument('--baseline', help='Compare against a saved baseline and exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown before a stage counts as regressed')
+    args = parser.parse_args()
+
+    image_server, image_urls = start_image_server(latency=tuple(args.image_latency))
+    if args.base_url:
+        client = OpenAI(api_key=OPENAI_KEY, base_url=args.base_url)
+        llm_server = None
+    else:
+        config = FakeOpenAIConfig(tuple(args.llm_latency), args.llm_error_rate, args.llm_rate_limit_rate, seed=0)
+        llm_server, base_url = start_fake_openai(config=config)
+        client = OpenAI(api_key="fake", base_url=base_url, max_retries=5)
+
+    if args.usernames:
+        users = [{"db_username": name} for name in args.usernames]
+    else:
+        users = synthetic_users(args.users, image_urls, args.posts, args.following)
+
+    timings = {stage: [] for stage in STAGES}
+    errors = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        list(executor.map(lambda u: bench_user(u, client, timings, errors), users))
+    elapsed = time.perf_counter() - start
+
+    report(timings, len(users), elapsed, errors)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({stage: sum(v) / len(v) for stage, v in timings.items() if v}, f, indent=4)
+        print(f"[Info] - Baseline saved to {args.save_baseline}")
+
+    image_server.shutdown()
+    if llm_server:
+        llm_server.shutdown()
+
+    if args.baseline and compare_to_baseline(timings, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
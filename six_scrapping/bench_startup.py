@@ -0,0 +1,104 @@
+import re
+import sys
+import time
+import argparse
+import subprocess
+from tabulate import tabulate
+
+# Run through -m so the package resolves the same way it does for the installed `six` script
+CLI_ARGV = [sys.executable, "-m", "six_scrapping.cli"]
+
+# `--help` makes each command import everything it needs and exit before touching the network or DB
+COMMANDS = {
+    "mutuals": ["mutuals", "--help"],
+    "export": ["export", "--help"],
+    "interests": ["interests", "--help"],
+    "interests --batch": ["interests", "--batch", "--help"],
+    "scrape-follows": ["scrape-follows", "--help"],
+    "scrape-posts": ["scrape-posts", "--help"],
+}
+# Commands that should start fast enough to script in a loop
+LIGHT_COMMANDS = ["mutuals", "export"]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_command(argv, runs):
+    """Wall time of `python -m six_scrapping.cli argv` per run, or (None, error) as soon as a run exits non-zero"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(CLI_ARGV + argv, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines()
+            return None, f"exit code {result.returncode}: {lines[-1] if lines else 'no output'}"
+        timings.append(time.perf_counter() - start)
+    return timings, None
+
+
+def slowest_imports(argv, top):
+    """The top-level modules with the largest cumulative import time, from python -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime"] + CLI_ARGV[1:] + argv,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line)
+        # Only modules imported directly by our own code, not their dependencies' internals
+        if match and len(match.group(2)) <= 3:
+            imports.append((int(match.group(1)), match.group(3)))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure how long each CLI command takes to start')
+    parser.add_argument('--runs', type=int, default=10, help='Runs per command')
+    parser.add_argument('--commands', nargs='+', choices=list(COMMANDS), default=list(COMMANDS))
+    parser.add_argument('--max-seconds', type=float, default=1.0,
+                        help='Exit 1 if a light command (mutuals, export) takes longer than this at p50')
+    parser.add_argument('--imports', type=int, default=0, help='Also list the N slowest imports per command')
+    args = parser.parse_args()
+
+    baseline, error = time_command(["--help"], args.runs)
+    if error:
+        print(f"[Error] - six --help failed ({error})")
+        sys.exit(1)
+    rows = [["six --help", f"{1000 * percentile(baseline, 50):.0f}", f"{1000 * percentile(baseline, 95):.0f}"]]
+    too_slow, failed = [], []
+    for name in args.commands:
+        timings, error = time_command(COMMANDS[name], args.runs)
+        if error:
+            # A command that can't even start (e.g. a missing dependency) has no startup time to report
+            print(f"[Warning] - Skipping {name}: {error}")
+            failed.append(name)
+            continue
+        p50 = percentile(timings, 50)
+        rows.append([name, f"{1000 * p50:.0f}", f"{1000 * percentile(timings, 95):.0f}"])
+        if name in LIGHT_COMMANDS and p50 > args.max_seconds:
+            too_slow.append(name)
+    print(tabulate(rows, headers=["Command", "p50 ms", "p95 ms"], tablefmt="pretty"))
+
+    if args.imports:
+        for name in [n for n in args.commands if n not in failed]:
+            print(f"\n[Info] - Slowest imports for {name}:")
+            for micros, module in slowest_imports(COMMANDS[name], args.imports):
+                print(f"  {micros / 1000:8.1f} ms  {module}")
+
+    if too_slow:
+        print(f"[Regression] - Slower than {args.max_seconds}s to start: {', '.join(too_slow)}")
+        sys.exit(1)
+    broken = [name for name in failed if name in LIGHT_COMMANDS]
+    if broken:
+        print(f"[Error] - Light commands failed to start: {', '.join(broken)}")
+        sys.exit(1)
+    print(f"[Info] - Light commands start within {args.max_seconds}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import os
+import time
+import asyncio
+import functools
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv, find_dotenv
+from six_scrapping.interest import connect_to_db, build_interest_content, local_tags_if_low_signal
+from six_scrapping.interest_store import INTEREST_RESPONSE_FORMAT, parse_interests, save_interest_tags
+from six_scrapping.llm_cache import get_llm_cache, cached_completion
+
+load_dotenv(find_dotenv(usecwd=True))
+
+OPENAI_KEY = os.environ.get('OPENAI_KEY')
+
+# Users with posts whose interest_tags haven't been filled in yet, minus the pks in %(skip)s
+PENDING_USERS_QUERY = """
+    SELECT d.pk, u.username, d.post_urls, d.captions, d.following_list
+    FROM user_detail d
+    JOIN user_data u ON u.pk = d.pk
+    WHERE d.post_urls IS NOT NULL
+      AND (%(force)s OR d.interest_tags IS NULL OR d.interest_tags = '')
+      AND d.pk <> ALL(%(skip)s::integer[])
+    ORDER BY d.pk
+    LIMIT %(limit)s
+"""
+
+
+class RateLimiter:
+    """Spread calls evenly so no more than requests_per_minute start in any minute"""
+
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def read_pending_users(queue, loop, limit, force, chunk_size=500):
+    """Stream pending users from a server-side cursor into the asyncio queue"""
+    conn = connect_to_db()
+    if not conn:
+        return 0
+    count = 0
+    try:
+        cursor = conn.cursor(name="bulk_interest_users")
+        cursor.itersize = chunk_size
+        cursor.execute(PENDING_USERS_QUERY, {"force": force, "limit": limit, "skip": []})
+        for pk, username, post_urls, captions, following_list in cursor:
+            user = {
+                "pk": pk,
+                "username": username,
+                "post_urls": post_urls or [],
+                "captions": captions or [],
+                "following_list": following_list or []
+            }
+            # Blocks this thread (not the event loop) while the queue is full
+            asyncio.run_coroutine_threadsafe(queue.put(user), loop).result()
+            count += 1
+        cursor.close()
+    finally:
+        conn.close()
+    return count
+
+
+async def run_workers(count, worker, in_queue, out_queue=None, out_workers=0):
+    """Run count workers over in_queue, then tell out_queue's workers to stop"""
+    async def loop():
+        while True:
+            item = await in_queue.get()
+            if item is None:
+                break
+            try:
+                result = await worker(item)
+            except Exception as e:
+                print(f"[Error] - Failed on {item.get('username', item)}: {e}")
+                continue
+            if result is not None and out_queue is not None:
+                await out_queue.put(result)
+
+    await asyncio.gather(*(loop() for _ in range(count)))
+    for _ in range(out_workers):
+        await out_queue.put(None)
+
+
+async def run_pipeline(args):
+    from openai import OpenAI
+    client = OpenAI(api_key=OPENAI_KEY)
+    cache = None if args.no_cache else get_llm_cache()
+    limiter = RateLimiter(args.rpm)
+    loop = asyncio.get_running_loop()
+    # Every stage hops into threads; size the pool so stages never starve each other
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=args.concurrency + args.prep_workers + 4))
+
+    # Bounded queues give backpressure: a slow LLM stage stops image prep from running ahead
+    users_queue = asyncio.Queue(maxsize=args.queue_size)
+    prepared_queue = asyncio.Queue(maxsize=args.queue_size)
+    results_queue = asyncio.Queue(maxsize=args.queue_size)
+
+    stats = {"analysed": 0, "local": 0, "written": 0, "start": time.perf_counter()}
+
+    async def read_stage():
+        try:
+            count = await loop.run_in_executor(None, read_pending_users, users_queue, loop, args.limit, args.force)
+            print(f"[Info] - Queued {count} users for analysis")
+        finally:
+            for _ in range(args.prep_workers):
+                await users_queue.put(None)
+
+    async def prepare(user):
+        if args.caption_prepass:
+            local_tags = local_tags_if_low_signal(user["post_urls"], user["captions"], user["following_list"])
+            if local_tags is not None:
+                stats["local"] += 1
+                return dict(user, tags=local_tags)
+        content = await loop.run_in_executor(
+            None, build_interest_content, user["post_urls"], user["captions"], user["following_list"],
+            args.caption_prepass, user["username"]
+        )
+        return dict(user, content=content)
+
+    def wait_for_rate_limit():
+        # Runs on the executor thread, only when the cache missed and the API is really called
+        asyncio.run_coroutine_threadsafe(limiter.acquire(), loop).result()
+
+    async def analyse(user):
+        if "tags" in user:
+            # Tagged locally by the caption pre-pass, no LLM call needed
+            return {"pk": user["pk"], "username": user["username"], "tags": user["tags"]}
+        response = await loop.run_in_executor(None, functools.partial(
+            cached_completion, client, [{"role": "user", "content": user["content"]}], "gpt-4o", cache,
+            before_call=wait_for_rate_limit, response_format=INTEREST_RESPONSE_FORMAT
+        ))
+        tags = parse_interests(response)
+        if tags is None:
+            # interest_tags stays empty, so the next run retries this user
+            print(f"[Error] - Not saving {user['username']}: reply didn't match the interest schema")
+            return None
+        stats["analysed"] += 1
+        print(f"[Info] - {user['username']}: {tags}")
+        return {"pk": user["pk"], "username": user["username"], "tags": tags}
+
+    async def write_stage():
+        conn = await loop.run_in_executor(None, connect_to_db)
+        if not conn:
+            # Keep draining, otherwise the analyse workers block on the full queue forever
+            while True:
+                result = await results_queue.get()
+                if result is None:
+                    break
+                print(f"[Error] - Not saved, no database connection: {result['username']}")
+            return
+        pending = []
+        try:
+            while True:
+                result = await results_queue.get()
+                if result is not None:
+                    pending.append((result["pk"], result["tags"]))
+                if pending and (result is None or len(pending) >= args.write_batch):
+                    stats["written"] += await loop.run_in_executor(None, save_interest_tags, conn, pending)
+                    pending = []
+                if result is None:
+                    break
+        finally:
+            conn.close()
+
+    await asyncio.gather(
+        read_stage(),
+        run_workers(args.prep_workers, prepare, users_queue, prepared_queue, args.concurrency),
+        run_workers(args.concurrency, analyse, prepared_queue, results_queue, 1),
+        write_stage()
+    )
+
+    elapsed = time.perf_counter() - stats["start"]
+    rate = stats["analysed"] / elapsed * 60 if elapsed > 0 else 0
+    print(f"[Success] - Analysed {stats['analysed']} users ({stats['local']} more tagged locally), "
+          f"wrote {stats['written']} interest_tags in {elapsed:.1f}s ({rate:.1f} users/min)")
+    if cache is not None:
+        print(cache.report())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyse interests for every user that needs it and write them to user_detail.interest_tags')
+    parser.add_argument('--limit', type=int, default=1000, help='Maximum number of users to analyse')
+    parser.add_argument('--force', action='store_true', help='Re-analyse users that already have interest_tags')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent LLM calls')
+    parser.add_argument('--rpm', type=int, default=300, help='Maximum LLM requests per minute (0 for no limit)')
+    parser.add_argument('--prep-workers', type=int, default=4, help='Users whose images are prepared at the same time')
+    parser.add_argument('--queue-size', type=int, default=16, help='Items buffered between pipeline stages')
+    parser.add_argument('--write-batch', type=int, default=50, help='interest_tags rows written per database round-trip')
+    parser.add_argument('--no-cache', action='store_true', help='Always call the API instead of reusing cached responses')
+    parser.add_argument('--caption-prepass', action='store_true',
+                        help='Send a hashtag/keyword summary instead of raw captions, and tag low-signal users locally')
+    args = parser.parse_args()
+
+    asyncio.run(run_pipeline(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os
+import re
+import json
+from collections import Counter
+
+HASHTAG_VOCAB_PATH = os.environ.get(
+    'HASHTAG_VOCAB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hashtag_vocab.json')
+)
+
+# Users with this little data are tagged from their captions alone, without an LLM call
+LOW_SIGNAL_MAX_POSTS = int(os.environ.get('LOW_SIGNAL_MAX_POSTS', '2'))
+LOW_SIGNAL_MAX_FOLLOWING = int(os.environ.get('LOW_SIGNAL_MAX_FOLLOWING', '10'))
+LOCAL_TAG_MIN_WEIGHT = float(os.environ.get('LOCAL_TAG_MIN_WEIGHT', '0.3'))
+
+HASHTAG_RE = re.compile(r"#(\w+)", re.UNICODE)
+MENTION_RE = re.compile(r"@([\w.]+)", re.UNICODE)
+WORD_RE = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+
+STOPWORDS = {
+    "the", "and", "for", "with", "this", "that", "you", "your", "are", "was", "were", "have", "has",
+    "had", "but", "not", "all", "any", "can", "our", "out", "from", "they", "them", "their", "what",
+    "when", "where", "who", "why", "how", "just", "like", "about", "into", "over", "more", "some",
+    "than", "then", "too", "very", "been", "being", "will", "would", "should", "could", "its", "it's",
+    "his", "her", "she", "him", "one", "get", "got", "day", "today", "time", "new", "link", "bio",
+    "here", "there", "now", "see", "via", "did", "don", "let", "lets", "also", "much", "many", "every",
+}
+
+_vocab = None
+
+
+def load_vocab(path=HASHTAG_VOCAB_PATH):
+    """Load the hashtag/keyword -> interest vocabulary (lowercase keys)"""
+    global _vocab
+    if _vocab is None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                _vocab = {k.lower(): v for k, v in json.load(f).items()}
+        except OSError as e:
+            # Without it tags aren't canonicalized and the caption pre-pass finds no candidate interests
+            print(f"[Warning] - Could not load the hashtag vocabulary from {path}: {e}")
+            _vocab = {}
+    return _vocab
+
+
+def dedupe_captions(captions):
+    """Drop empty and duplicate captions, and plain-text lines repeated across posts (sign-offs, 'link in bio', ...)
+
+    Repeated hashtag lines are kept: a tag used on every post is signal, not boilerplate.
+    """
+    captions = [c for c in captions if c and c.strip()]
+    line_counts = Counter(
+        line.strip().lower() for caption in captions for line in set(caption.splitlines()) if line.strip()
+    )
+    deduped = []
+    for caption in captions:
+        lines = [line for line in caption.splitlines()
+                 if line.strip() and ('#' in line or len(captions) < 3 or line_counts[line.strip().lower()] < 2)]
+        if lines:
+            deduped.append("\n".join(lines))
+    return list(dict.fromkeys(deduped))
+
+
+def extract_caption_signals(captions, vocab=None):
+    """Count hashtags, mentions and keywords per post and map them to weighted interest candidates"""
+    vocab = load_vocab() if vocab is None else vocab
+    captions = dedupe_captions(captions or [])
+
+    hashtags, mentions, keywords = Counter(), Counter(), Counter()
+    for caption in captions:
+        # Count each term once per post so one spammy caption can't dominate
+        post_tags = {t.lower() for t in HASHTAG_RE.findall(caption)}
+        post_mentions = {m.lower().rstrip(".") for m in MENTION_RE.findall(caption)}
+        text = MENTION_RE.sub(" ", HASHTAG_RE.sub(" ", caption))
+        post_words = {w.lower() for w in WORD_RE.findall(text)} - STOPWORDS
+        hashtags.update(post_tags)
+        mentions.update(post_mentions)
+        keywords.update(post_words)
+
+    scores = Counter()
+    for tag, count in hashtags.items():
+        if tag in vocab:
+            scores[vocab[tag]] += 2 * count
+    for word, count in keywords.items():
+        if word in vocab:
+            scores[vocab[word]] += count
+
+    top = max(scores.values()) if scores else 0
+    candidates = [(interest, round(score / top, 2)) for interest, score in scores.most_common()]
+    return {
+        "posts": len(captions),
+        "hashtags": hashtags,
+        "mentions": mentions,
+        "keywords": keywords,
+        "candidates": candidates
+    }
+
+
+def compact_captions(signals, limit=25):
+    """Render the signals as one short text block to send instead of the raw captions"""
+    def fmt(counter, prefix=""):
+        return ", ".join(f"{prefix}{term} ({count})" for term, count in counter.most_common(limit)) or "none"
+
+    candidates = ", ".join(f"{interest} ({weight})" for interest, weight in signals["candidates"][:limit])
+    return (
+        f"Caption summary for {signals['posts']} posts (number of posts in brackets):\n"
+        f"Candidate interests from hashtags and keywords: {candidates or 'none'}\n"
+        f"Hashtags: {fmt(signals['hashtags'], '#')}\n"
+        f"Mentions: {fmt(signals['mentions'], '@')}\n"
+        f"Keywords: {fmt(signals['keywords'])}"
+    )
+
+
+def is_low_signal(img_urls, following_list):
+    """Too few posts and followed accounts for an LLM call to add much"""
+    return len(img_urls or []) <= LOW_SIGNAL_MAX_POSTS and len(following_list or []) <= LOW_SIGNAL_MAX_FOLLOWING
+
+
+def local_interest_tags(signals, min_weight=LOCAL_TAG_MIN_WEIGHT):
+    """Candidate interests weighted at least min_weight, or None when nothing in the vocabulary matched"""
+    tags = [interest for interest, weight in signals["candidates"] if weight >= min_weight]
+    return tags or None
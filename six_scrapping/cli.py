@@ -0,0 +1,91 @@
+import os
+import sys
+import argparse
+import importlib
+import configparser
+
+# Subcommand -> (module whose main(argv) runs it, help). Modules are only imported once their
+# subcommand is picked, so `mutuals` never loads Selenium and `export` never loads OpenAI or Pillow.
+COMMANDS = {
+    "scrape-follows": ("follow_scraper", "Scrape followers and following lists"),
+    "scrape-posts": ("post_scraper", "Scrape recent posts and their metadata"),
+    "interests": ("interest", "Predict a user's interests (add --batch for large following lists)"),
+    "mutuals": ("get_mutual_followers", "Find mutual followers of two users"),
+    "export": ("export_data", "Export tables to JSON Lines or Parquet"),
+}
+
+# Switches that prompt when left out, so `key = false` in the config has to pass the negative flag.
+# Every other switch is off unless given, and a false value simply leaves it out.
+NEGATIVE_FLAGS = {
+    "scrape-posts": {"save": "--no-save"},
+}
+
+CONFIG_ENV = "SCRAPER_CONFIG"
+DEFAULT_CONFIG_PATHS = ["scraper.ini", os.path.join(os.path.expanduser("~"), ".config", "six", "scraper.ini")]
+
+
+def load_config(path=None):
+    """Read the first config file that exists; each [section] holds flag defaults for one subcommand"""
+    config = configparser.ConfigParser()
+    paths = [path] if path else [os.environ.get(CONFIG_ENV)] + DEFAULT_CONFIG_PATHS
+    for candidate in paths:
+        if candidate and os.path.exists(candidate):
+            config.read(candidate, encoding="utf-8")
+            break
+    else:
+        if path:
+            print(f"[Warning] - Config file {path} not found")
+    return config
+
+
+def config_argv(config, command):
+    """Turn a config section into flags: `followers = 100` -> --followers 100, `no-cache = true` -> --no-cache,
+    `save = false` -> --no-save for switches that would otherwise prompt.
+
+    They go before the command-line flags, so anything typed on the command line wins.
+    """
+    if not config.has_section(command):
+        return []
+    argv = []
+    for key, value in config.items(command, raw=True):
+        if key in config.defaults():
+            continue
+        name = key.replace("_", "-")
+        if value.lower() in ("true", "yes", "on"):
+            argv.append("--" + name)
+        elif value.lower() in ("false", "no", "off"):
+            negative = NEGATIVE_FLAGS.get(command, {}).get(name)
+            if negative:
+                argv.append(negative)
+        elif value:
+            argv.extend(["--" + name, value])
+    return argv
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(
+        prog="six", allow_abbrev=False,
+        description="Instagram scraping and interest analysis. Run `six <command> --help` for a command's flags."
+    )
+    parser.add_argument("--config", help=f"Config file with flag defaults per command "
+                                          f"(default: ${CONFIG_ENV}, then ./scraper.ini)")
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    subparsers.required = True
+    for name, (_, help_text) in COMMANDS.items():
+        # The command's own parser handles its flags and --help, so nothing is declared here
+        subparsers.add_parser(name, help=help_text, add_help=False)
+
+    args, rest = parser.parse_known_args(argv)
+    command_argv = config_argv(load_config(args.config), args.command) + rest
+    module_name = COMMANDS[args.command][0]
+    if args.command == "interests" and "--batch" in command_argv:
+        command_argv = [a for a in command_argv if a != "--batch"]
+        module_name = "batch_interest"
+
+    module = importlib.import_module(f"six_scrapping.{module_name}")
+    return module.main(command_argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+import os
+import json
+import time
+import argparse
+from datetime import datetime, date, timezone
+import psycopg2
+from dotenv import load_dotenv, find_dotenv
+
+# Each export reads from a named (server-side) cursor so PostgreSQL only ever
+# hands us CHUNK_SIZE rows at a time, no matter how large the arrays are.
+DEFAULT_CHUNK_SIZE = 5000
+STATE_FILE = ".export_state.json"
+# The mutual-follows trigger deletes and reinserts a user's rows, and an incremental export can't
+# show deletions, so these tables are always exported in full
+FULL_SNAPSHOT_TABLES = {"mutual_follows"}
+
+# Queries take a single %(since)s parameter; NULL means "export everything".
+EXPORT_QUERIES = {
+    "user_data": """
+        SELECT u.pk, u.username, u.full_name, u.profile_pic_url, u.profile_pic_url_hd,
+               u.is_private, d.updated_at
+        FROM user_data u
+        LEFT JOIN user_detail d ON d.pk = u.pk
+        WHERE %(since)s::timestamptz IS NULL OR d.updated_at > %(since)s::timestamptz
+        ORDER BY u.pk
+    """,
+    "user_detail": """
+        SELECT d.pk, u.username, d.is_verified, d.is_business, d.biography,
+               d.follower_count, d.following_count, d.external_url, d.category_name,
+               d.city_name, d.latitude, d.longitude, d.post_urls, d.captions, d.likes,
+               d.posted_at, d.interest_tags, d.updated_at
+        FROM user_detail d
+        JOIN user_data u ON u.pk = d.pk
+        WHERE %(since)s::timestamptz IS NULL OR d.updated_at > %(since)s::timestamptz
+        ORDER BY d.pk
+    """,
+    # Unnest the follower/following arrays on the server so the client only
+    # ever sees one (follower, followee) edge per row.
+    "follow_edges": """
+        SELECT f.username AS follower_username, u.username AS followee_username,
+               'followers_list' AS source, d.updated_at
+        FROM user_detail d
+        JOIN user_data u ON u.pk = d.pk
+        CROSS JOIN LATERAL unnest(d.followers_list) AS f(username)
+        WHERE %(since)s::timestamptz IS NULL OR d.updated_at > %(since)s::timestamptz
+        UNION ALL
+        SELECT u.username AS follower_username, f.username AS followee_username,
+               'following_list' AS source, d.updated_at
+        FROM user_detail d
+        JOIN user_data u ON u.pk = d.pk
+        CROSS JOIN LATERAL unnest(d.following_list) AS f(username)
+        WHERE %(since)s::timestamptz IS NULL OR d.updated_at > %(since)s::timestamptz
+    """,
+    "mutual_follows": """
+        SELECT m.follower_username, m.followee_username, d.updated_at
+        FROM mutual_follows m
+        JOIN user_data u ON u.username = m.followee_username
+        LEFT JOIN user_detail d ON d.pk = u.pk
+        WHERE %(since)s::timestamptz IS NULL OR d.updated_at > %(since)s::timestamptz
+    """,
+}
+
+
+def load_environment():
+    """Load environment variables from .env file"""
+    load_dotenv(find_dotenv(usecwd=True))
+    return {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'instagram'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', 'postgres'),
+        'port': os.getenv('DB_PORT', '5432')
+    }
+
+
+def load_state(out_dir):
+    """Load the per-table watermarks written by the previous export"""
+    path = os.path.join(out_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(out_dir, state):
+    path = os.path.join(out_dir, STATE_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+# PostgreSQL type OIDs (cursor.description type_code) -> Arrow type names, so a chunk where a column
+# is all NULL still gets the column's real type. Anything else is inferred from the first chunk.
+PG_ARROW_TYPES = {
+    16: "bool", 21: "int16", 23: "int32", 20: "int64", 700: "float32", 701: "float64",
+    25: "string", 1042: "string", 1043: "string", 1082: "date32", 1114: "timestamp", 1184: "timestamptz",
+}
+PG_ARRAY_TYPES = {1000: 16, 1005: 21, 1007: 23, 1016: 20, 1021: 700, 1022: 701,
+                  1009: 25, 1014: 1042, 1015: 1043, 1182: 1082, 1115: 1114, 1185: 1184}
+
+
+def parse_timestamp(value):
+    """Parse an ISO timestamp into an aware datetime; naive values are taken as UTC"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class JsonlWriter:
+    """Append rows to a JSON Lines file one chunk at a time"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write_chunk(self, description, rows):
+        columns = [desc[0] for desc in description]
+        lines = [json.dumps(dict(zip(columns, row)), default=json_default, ensure_ascii=False) for row in rows]
+        self.file.write("\n".join(lines) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """Write each chunk as a Parquet row group so memory stays bounded"""
+
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = path
+        self.writer = None
+
+    def arrow_type(self, name):
+        if name == "timestamp":
+            return self.pa.timestamp("us")
+        if name == "timestamptz":
+            return self.pa.timestamp("us", tz="UTC")
+        return getattr(self.pa, name)()
+
+    def build_schema(self, description, rows):
+        """Schema from the column types PostgreSQL reports, not from whatever the first chunk happens to hold"""
+        fields = []
+        for i, desc in enumerate(description):
+            type_code = desc[1]
+            if type_code in PG_ARROW_TYPES:
+                arrow_type = self.arrow_type(PG_ARROW_TYPES[type_code])
+            elif type_code in PG_ARRAY_TYPES:
+                arrow_type = self.pa.list_(self.arrow_type(PG_ARROW_TYPES[PG_ARRAY_TYPES[type_code]]))
+            else:
+                arrow_type = self.pa.array([row[i] for row in rows]).type
+                if self.pa.types.is_null(arrow_type):
+                    # All NULL and no known type: text can hold whatever later chunks bring
+                    arrow_type = self.pa.string()
+            fields.append(self.pa.field(desc[0], arrow_type))
+        return self.pa.schema(fields)
+
+    def write_chunk(self, description, rows):
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, self.build_schema(description, rows))
+        columns = self.writer.schema.names
+        table = self.pa.Table.from_pylist([dict(zip(columns, row)) for row in rows], schema=self.writer.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {
+    "jsonl": JsonlWriter,
+    "parquet": ParquetWriter,
+}
+
+
+def export_table(conn, table, out_dir, fmt="jsonl", since=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream one table to disk and return (rows written, max updated_at seen).
+
+    since is an aware datetime; it is compared in the query, never as text.
+    """
+    suffix = f"_since_{since.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%S')}" if since else ""
+    path = os.path.join(out_dir, f"{table}{suffix}.{fmt}")
+    writer = WRITERS[fmt](path)
+
+    rows_written = 0
+    watermark = since
+    start = time.perf_counter()
+
+    # Named cursors live on the server; psycopg2 pulls itersize rows per round-trip
+    cursor = conn.cursor(name=f"export_{table}")
+    cursor.itersize = chunk_size
+    try:
+        cursor.execute(EXPORT_QUERIES[table], {"since": since})
+        columns = None
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if columns is None:
+                columns = [desc[0] for desc in cursor.description]
+            writer.write_chunk(cursor.description, rows)
+            rows_written += len(rows)
+
+            updated_idx = columns.index("updated_at")
+            for row in rows:
+                row_mark = row[updated_idx]
+                if row_mark is not None and (watermark is None or row_mark > watermark):
+                    watermark = row_mark
+
+            elapsed = time.perf_counter() - start
+            print(f"[Info] - {table}: {rows_written} rows ({rows_written / elapsed:.0f} rows/sec)")
+    finally:
+        cursor.close()
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    rate = rows_written / elapsed if elapsed > 0 else 0
+    print(f"[Info] - Exported {rows_written} {table} rows to {path} in {elapsed:.1f}s ({rate:.0f} rows/sec)")
+    return rows_written, watermark
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stream scraped data out of PostgreSQL into JSONL or Parquet files')
+    parser.add_argument('--tables', nargs='+', choices=list(EXPORT_QUERIES), default=list(EXPORT_QUERIES),
+                        help='Tables to export (follow_edges unnests the follower arrays into edge rows)')
+    parser.add_argument('--format', choices=list(WRITERS), default='jsonl', help='Output file format')
+    parser.add_argument('--out', default='exports', help='Output directory')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows fetched per round-trip')
+    parser.add_argument('--since', help='Only export rows updated after this ISO timestamp')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Continue from the watermark saved by the previous export')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    state = load_state(args.out)
+
+    try:
+        conn = psycopg2.connect(**load_environment())
+    except Exception as e:
+        print(f"Database error: {e}")
+        return
+
+    # Named cursors need a transaction; make it read-only so nothing is locked for writing
+    conn.set_session(readonly=True)
+
+    try:
+        total_rows = 0
+        start = time.perf_counter()
+        for table in args.tables:
+            since = args.since or (state.get(table) if args.incremental else None)
+            if table in FULL_SNAPSHOT_TABLES:
+                since = None
+            since = parse_timestamp(since) if since else None
+            rows, watermark = export_table(conn, table, args.out, args.format, since, args.chunk_size)
+            total_rows += rows
+            if watermark and table not in FULL_SNAPSHOT_TABLES:
+                state[table] = watermark.isoformat()
+        conn.commit()
+        save_state(args.out, state)
+
+        elapsed = time.perf_counter() - start
+        rate = total_rows / elapsed if elapsed > 0 else 0
+        print(f"[Success] - Exported {total_rows} rows in {elapsed:.1f}s ({rate:.0f} rows/sec)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import io
+import os
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from PIL import Image, ImageDraw
+
+CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "heic": "image/heic",
+}
+
+
+def render_fixture(index, size=(1080, 1350)):
+    """A noisy gradient with shapes, so encoders do realistic amounts of work"""
+    rng = random.Random(index)
+    image = Image.linear_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        r = rng.randrange(20, 200)
+        draw.ellipse((x - r, y - r, x + r, y + r),
+                     fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    noise = Image.effect_noise(size, 40).convert("RGB")
+    return Image.blend(image, noise, 0.15)
+
+
+def encode_fixture(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == "jpg":
+        image.save(buffer, format="JPEG", quality=92)
+    elif fmt == "png":
+        image.save(buffer, format="PNG")
+    elif fmt == "webp":
+        image.save(buffer, format="WEBP", quality=90)
+    elif fmt == "heic":
+        # Pillow can't write HEIC on its own; pillow-heif adds the encoder when installed
+        try:
+            import pillow_heif
+        except ImportError:
+            return None
+        pillow_heif.register_heif_opener()
+        image.save(buffer, format="HEIF", quality=90)
+    return buffer.getvalue()
+
+
+def build_fixtures(count_per_format=4, formats=("jpg", "png", "webp", "heic"), fixtures_dir=None):
+    """Return {path: (content_type, bytes)}; HEIC comes from pillow-heif or from files in fixtures_dir"""
+    fixtures = {}
+    for fmt in formats:
+        for i in range(count_per_format):
+            data = encode_fixture(render_fixture(i), fmt)
+            if data is not None:
+                fixtures[f"/img/{fmt}/{i}.{fmt}"] = (CONTENT_TYPES[fmt], data)
+
+    if fixtures_dir and os.path.isdir(fixtures_dir):
+        for name in sorted(os.listdir(fixtures_dir)):
+            ext = name.rsplit(".", 1)[-1].lower()
+            if ext == "jpeg":
+                ext = "jpg"
+            if ext in CONTENT_TYPES:
+                with open(os.path.join(fixtures_dir, name), "rb") as f:
+                    fixtures[f"/img/files/{name}"] = (CONTENT_TYPES[ext], f.read())
+    return fixtures
+
+
+class FakeImageHandler(BaseHTTPRequestHandler):
+    fixtures = {}
+    latency = (0.0, 0.0)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        # Ignore the query string, like the real CDN signature parameters
+        path = urlparse(self.path).path
+        if path not in self.fixtures:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        time.sleep(random.uniform(*self.latency))
+        content_type, data = self.fixtures[path]
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_image_server(host="127.0.0.1", port=0, latency=(0.0, 0.0), fixtures=None):
+    """Start the server on a background thread; returns (server, list of fixture URLs)"""
+    fixtures = fixtures if fixtures is not None else build_fixtures()
+    handler = type("ConfiguredFakeImageHandler", (FakeImageHandler,), {"fixtures": fixtures, "latency": latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://{host}:{server.server_address[1]}"
+    # A signature-like query string, so cache keys get exercised the same way as on the CDN
+    urls = [f"{base_url}{path}?oh={random.getrandbits(64):x}&oe=0" for path in sorted(fixtures)]
+    return server, urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve JPEG, PNG, WebP and HEIC fixtures as a stand-in for the Instagram CDN')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', type=float, nargs=2, default=[0.05, 0.3], metavar=('MIN', 'MAX'))
+    parser.add_argument('--fixtures-dir', help='Extra image files to serve, e.g. real HEIC photos')
+    args = parser.parse_args()
+
+    fixtures = build_fixtures(fixtures_dir=args.fixtures_dir)
+    server, urls = start_image_server(args.host, args.port, tuple(args.latency), fixtures)
+    print(f"[Info] - Serving {len(urls)} images:")
+    for url in urls:
+        print(url)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
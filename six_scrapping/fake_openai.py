@@ -0,0 +1,257 @@
+import re
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Canned answers, picked so the parsers in interest_store have something realistic to chew on
+FAKE_INTERESTS = ["photography", "travel", "hiking", "coffee", "fitness", "music", "food", "fashion"]
+
+
+class FakeOpenAIConfig:
+    def __init__(self, latency=(0.0, 0.0), error_rate=0.0, rate_limit_rate=0.0, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.files = {}
+        self.batches = {}
+
+
+def fake_completion_content(body):
+    """Build an answer in whatever shape the request asked for"""
+    messages = body.get("messages", [])
+    text = " ".join(
+        part.get("text", "") if isinstance(part, dict) else ""
+        for message in messages
+        for part in (message["content"] if isinstance(message["content"], list) else [{"text": message["content"]}])
+    )
+    picked = [interest for interest in FAKE_INTERESTS if interest in text.lower()] or FAKE_INTERESTS[:3]
+
+    if body.get("response_format", {}).get("type") == "json_schema":
+        return json.dumps({"interests": [{"name": name, "confidence": 0.8} for name in picked]})
+
+    if "JSON object mapping every username" in text:
+        batch = text.split("follows:", 1)[-1].split("For each account", 1)[0]
+        usernames = [u.strip() for u in batch.splitlines() if u.strip()]
+        return json.dumps({u: [FAKE_INTERESTS[hash(u) % len(FAKE_INTERESTS)]] for u in usernames})
+
+    return json.dumps(picked)
+
+
+def fake_completion(body):
+    content = fake_completion_content(body)
+    prompt_tokens = sum(len(json.dumps(m.get("content", ""))) for m in body.get("messages", [])) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4
+        }
+    }
+
+
+def parse_multipart_file(content_type, body):
+    """Return (filename, bytes, purpose) from a multipart/form-data upload"""
+    boundary = re.search(r'boundary="?([^";]+)"?', content_type).group(1).encode()
+    filename, data, purpose = "upload.jsonl", b"", "batch"
+    for part in body.split(b"--" + boundary):
+        if b"\r\n\r\n" not in part:
+            continue
+        headers, value = part.split(b"\r\n\r\n", 1)
+        value = value[:-2] if value.endswith(b"\r\n") else value
+        name = re.search(rb'name="([^"]+)"', headers)
+        if not name:
+            continue
+        if name.group(1) == b"file":
+            match = re.search(rb'filename="([^"]*)"', headers)
+            filename = match.group(1).decode() if match else filename
+            data = value
+        elif name.group(1) == b"purpose":
+            purpose = value.decode()
+    return filename, data, purpose
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    config = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def do_POST(self):
+        body = self.read_body()
+        if self.path.endswith("/chat/completions"):
+            self.handle_chat(json.loads(body))
+        elif self.path.endswith("/files"):
+            self.handle_file_upload(body)
+        elif self.path.endswith("/batches"):
+            self.handle_batch_create(json.loads(body))
+        else:
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_GET(self):
+        match = re.search(r"/files/([^/]+)/content$", self.path)
+        if match and match.group(1) in self.config.files:
+            data = self.config.files[match.group(1)]["data"]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        match = re.search(r"/batches/([^/]+)$", self.path)
+        if match and match.group(1) in self.config.batches:
+            self.send_json(200, self.config.batches[match.group(1)])
+            return
+
+        self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def handle_chat(self, body):
+        config = self.config
+        with config.lock:
+            config.requests += 1
+            roll = config.random.random()
+            delay = config.random.uniform(*config.latency)
+
+        if roll < config.rate_limit_rate:
+            with config.lock:
+                config.rate_limited += 1
+            self.send_json(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                           {"Retry-After": "1"})
+            return
+        if roll < config.rate_limit_rate + config.error_rate:
+            with config.lock:
+                config.errors += 1
+            self.send_json(500, {"error": {"message": "Fake server error", "type": "server_error"}})
+            return
+
+        time.sleep(delay)
+        self.send_json(200, fake_completion(body))
+
+    def handle_file_upload(self, body):
+        filename, data, purpose = parse_multipart_file(self.headers.get("Content-Type", ""), body)
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        record = {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(data),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed"
+        }
+        self.config.files[file_id] = dict(record, data=data)
+        self.send_json(200, record)
+
+    def handle_batch_create(self, body):
+        """Run every request in the input file right away and publish the output file"""
+        input_file = self.config.files.get(body.get("input_file_id"))
+        if input_file is None:
+            self.send_json(404, {"error": {"message": "Unknown input_file_id"}})
+            return
+
+        lines, failed = [], 0
+        for line in input_file["data"].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            failing = self.config.random.random() < self.config.error_rate
+            failed += failing
+            lines.append(json.dumps({
+                "id": f"batch_req_{uuid.uuid4().hex[:24]}",
+                "custom_id": request["custom_id"],
+                "response": {
+                    "status_code": 500 if failing else 200,
+                    "body": {} if failing else fake_completion(request["body"])
+                },
+                "error": None
+            }))
+
+        output_id = f"file-{uuid.uuid4().hex[:24]}"
+        output = ("\n".join(lines) + "\n").encode("utf-8")
+        self.config.files[output_id] = {"id": output_id, "object": "file", "bytes": len(output),
+                                        "created_at": int(time.time()), "filename": "output.jsonl",
+                                        "purpose": "batch_output", "status": "processed", "data": output}
+
+        batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+        now = int(time.time())
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body.get("endpoint"),
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "completed",
+            "output_file_id": output_id,
+            "error_file_id": None,
+            "created_at": now,
+            "completed_at": now,
+            "request_counts": {"total": len(lines), "completed": len(lines) - failed, "failed": failed}
+        }
+        self.config.batches[batch_id] = batch
+        self.send_json(200, batch)
+
+
+def start_fake_openai(host="127.0.0.1", port=0, config=None):
+    """Start the server on a background thread; returns (server, base_url for OpenAI(base_url=...))"""
+    handler = type("ConfiguredFakeOpenAIHandler", (FakeOpenAIHandler,), {"config": config or FakeOpenAIConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the OpenAI chat completions, files and batches APIs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, nargs=2, default=[0.5, 1.5], metavar=('MIN', 'MAX'),
+                        help='Seconds each chat completion takes, drawn uniformly')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 429')
+    parser.add_argument('--seed', type=int, help='Random seed for repeatable latency and errors')
+    args = parser.parse_args()
+
+    config = FakeOpenAIConfig(tuple(args.latency), args.error_rate, args.rate_limit_rate, args.seed)
+    server, base_url = start_fake_openai(args.host, args.port, config)
+    print(f"[Info] - Fake OpenAI API listening on {base_url} (set OPENAI_BASE_URL or pass --base-url)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
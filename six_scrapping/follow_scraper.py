@@ -1,6 +1,7 @@
 import time
 from random import randint
 import os
+import argparse
 import psycopg2
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -11,10 +12,15 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.service import Service as ChromeService
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import NoSuchElementException
-from dotenv import load_dotenv, set_key
+from dotenv import load_dotenv, find_dotenv, set_key
+from six_scrapping.profile_meta import read_profile, is_hidden, estimate_scrape_seconds, save_profiles
+from six_scrapping.recrawl_scheduler import record_spend, scrape_requests
+
+TIMEOUT = 15
 
 def save_credentials(username, password):
-    env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+    # Next to the .env that load_dotenv reads, or a new one in the working directory
+    env_path = find_dotenv(usecwd=True) or os.path.join(os.getcwd(), '.env')
     set_key(env_path, 'INSTAGRAM_USERNAME', username)
     set_key(env_path, 'INSTAGRAM_PASSWORD', password)
     print("[Info] - Credentials saved to .env file")
@@ -22,7 +28,7 @@ def save_credentials(username, password):
 
 def load_credentials():
     # Load variables from .env file
-    load_dotenv()
+    load_dotenv(find_dotenv(usecwd=True))
     
     username = os.environ.get('INSTAGRAM_USERNAME')
     password = os.environ.get('INSTAGRAM_PASSWORD')
@@ -68,7 +74,7 @@ def login(bot, username, password):
 
 
 def connect_to_database():
-    load_dotenv()
+    load_dotenv(find_dotenv(usecwd=True))
     db_host = os.environ.get('DB_HOST', 'localhost')
     db_name = os.environ.get('DB_NAME', 'instagram')
     db_user = os.environ.get('DB_USER', 'postgres')
@@ -170,9 +176,25 @@ def insert_new_user(conn, username):
         return None
 
 
-def scrape_following(bot, username, user_type='followers', count=None):
+def scrape_following(bot, username, user_type='followers', count=None, profiles=None):
     bot.get(f'https://www.instagram.com/{username}/')
     time.sleep(3.5)
+
+    # Profile metadata comes from the page we just loaded, and lets us skip lists we can't or needn't scroll
+    profile = read_profile(bot, username, profiles)
+    if is_hidden(profile):
+        print(f"[Info] - {username} is private, skipping {user_type}")
+        return []
+    if profile:
+        total = profile.get("follower_count" if user_type == 'followers' else "following_count")
+        if total == 0:
+            print(f"[Info] - {username} has no {user_type}")
+            return []
+        if total is not None:
+            limits = {"followers": count, "following": 0} if user_type == 'followers' else {"followers": 0, "following": count}
+            estimate = estimate_scrape_seconds(profile, **limits)
+            print(f"[Info] - {username} has {total} {user_type}, about {estimate // 60:.0f} min to scrape")
+
     WebDriverWait(bot, TIMEOUT).until(ec.presence_of_element_located(
         (By.XPATH, f"//a[contains(@href, '/{user_type}')]"))).click()
     time.sleep(randint(2, 8))
@@ -239,7 +261,8 @@ def scrape_following(bot, username, user_type='followers', count=None):
     return list(users)
 
 
-def scrape(use_proxy=False, proxy_info=None):
+def scrape(use_proxy=False, proxy_info=None, usernames=None, followers_count=None, following_count=None):
+    """Scrape follow lists; anything not passed in (usernames, counts as a number or 'all') is asked for"""
     credentials = load_credentials()
 
     if credentials is None:
@@ -247,15 +270,18 @@ def scrape(use_proxy=False, proxy_info=None):
     else:
         username, password = credentials
 
-    usernames = input("Enter the Instagram usernames you want to scrape (separated by commas): ").split(",")
+    if usernames is None:
+        usernames = input("Enter the Instagram usernames you want to scrape (separated by commas): ").split(",")
     
     # Ask for count limits
-    followers_count = input("How many followers to scrape per user? (Enter 'all' for all): ")
-    following_count = input("How many following to scrape per user? (Enter 'all' for all): ")
+    if followers_count is None:
+        followers_count = input("How many followers to scrape per user? (Enter 'all' for all): ")
+    if following_count is None:
+        following_count = input("How many following to scrape per user? (Enter 'all' for all): ")
     
     # Convert to integers or set to None for 'all'
-    followers_count = None if followers_count.lower() == 'all' else int(followers_count)
-    following_count = None if following_count.lower() == 'all' else int(following_count)
+    followers_count = None if str(followers_count).lower() == 'all' else int(followers_count)
+    following_count = None if str(following_count).lower() == 'all' else int(following_count)
 
     # Connect to the database
     conn = connect_to_database()
@@ -282,11 +308,18 @@ def scrape(use_proxy=False, proxy_info=None):
     bot = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()))
     login(bot, username, password)
 
+    profiles = {}
+    # Requests per user, hidden profiles included, for the daily scrape budget
+    requests = 0
     for user in usernames:
         user = user.strip()
-        followers = scrape_following(bot, user, user_type='followers', count=followers_count)
+        followers = scrape_following(bot, user, user_type='followers', count=followers_count, profiles=profiles)
+        if is_hidden(profiles.get(user)):
+            requests += scrape_requests(followers=followers)
+            continue
         time.sleep(randint(2, 8))
-        following = scrape_following(bot, user, user_type='following', count=following_count)
+        following = scrape_following(bot, user, user_type='following', count=following_count, profiles=profiles)
+        requests += scrape_requests(followers=followers, following=following)
         
         # Save to database if connection exists
         if conn:
@@ -306,14 +339,17 @@ def scrape(use_proxy=False, proxy_info=None):
                     update_user_lists(conn, user_pk, followers, following)
 
     if conn:
+        save_profiles(conn, profiles)
+        # Follow lists alone are a partial scrape: they count against the budget, but only a full
+        # crawl (one_shot.py or the recrawl scheduler) updates scrape_state
+        record_spend(conn, requests)
         conn.close()
         print("[Info] - Database connection closed")
     
     bot.quit()
 
 
-if __name__ == '__main__':
-    TIMEOUT = 15
+def prompt_proxy():
     use_proxy = input("Do you want to use a proxy? (yes/no): ").lower() == 'yes'
     
     proxy_info = None
@@ -326,5 +362,27 @@ if __name__ == '__main__':
             proxy_info = {"host": host, "port": port}
         else:
             proxy_info = input("Enter proxy in format 'host:port': ")
-    
-    scrape(use_proxy=use_proxy, proxy_info=proxy_info)
+    return use_proxy, proxy_info
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scrape followers and following lists from Instagram profiles')
+    parser.add_argument('--usernames', help='Comma-separated usernames to scrape (prompted for when omitted)')
+    parser.add_argument('--followers', help="Followers to scrape per user, or 'all' (prompted for when omitted)")
+    parser.add_argument('--following', help="Followed accounts to scrape per user, or 'all' (prompted for when omitted)")
+    parser.add_argument('--proxy', help="Proxy as host:port")
+    args = parser.parse_args(argv)
+
+    # With no flags at all this is the original interactive session, proxy question included
+    if not any([args.usernames, args.followers, args.following, args.proxy]):
+        use_proxy, proxy_info = prompt_proxy()
+    else:
+        use_proxy, proxy_info = bool(args.proxy), args.proxy
+
+    usernames = args.usernames.split(",") if args.usernames else None
+    scrape(use_proxy=use_proxy, proxy_info=proxy_info, usernames=usernames,
+           followers_count=args.followers, following_count=args.following)
+
+
+if __name__ == '__main__':
+    main()
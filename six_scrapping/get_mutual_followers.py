@@ -1,12 +1,12 @@
 import os
 import psycopg2
 import argparse
-from dotenv import load_dotenv
+from dotenv import load_dotenv, find_dotenv
 from tabulate import tabulate
 
 def load_environment():
     """Load environment variables from .env file"""
-    load_dotenv()
+    load_dotenv(find_dotenv(usecwd=True))
     return {
         'host': os.getenv('DB_HOST', 'localhost'),
         'database': os.getenv('DB_NAME'),
@@ -15,6 +15,15 @@ def load_environment():
         'port': os.getenv('DB_PORT', '5432')
     }
 
+# Query to find mutual followers
+MUTUAL_FOLLOWERS_QUERY = """
+SELECT m1.follower_username
+FROM mutual_follows m1
+JOIN mutual_follows m2 ON m1.follower_username = m2.follower_username
+WHERE m1.followee_username = %s AND m2.followee_username = %s
+ORDER BY m1.follower_username
+"""
+
 def get_mutual_followers(username1, username2, db_config):
     """Find users who follow both specified users"""
     try:
@@ -22,16 +31,7 @@ def get_mutual_followers(username1, username2, db_config):
         connection = psycopg2.connect(**db_config)
         cursor = connection.cursor()
 
-        # Query to find mutual followers
-        query = """
-        SELECT m1.follower_username
-        FROM mutual_follows m1
-        JOIN mutual_follows m2 ON m1.follower_username = m2.follower_username
-        WHERE m1.followee_username = %s AND m2.followee_username = %s
-        ORDER BY m1.follower_username
-        """
-        
-        cursor.execute(query, (username1, username2))
+        cursor.execute(MUTUAL_FOLLOWERS_QUERY, (username1, username2))
         mutual_followers = cursor.fetchall()
         
         # Close the database connection
@@ -44,12 +44,12 @@ def get_mutual_followers(username1, username2, db_config):
         print(f"Database error: {e}")
         return []
 
-def main():
+def main(argv=None):
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Find mutual followers between two Instagram users')
     parser.add_argument('username1', help='First Instagram username')
     parser.add_argument('username2', help='Second Instagram username')
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Load database configuration
     db_config = load_environment()
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import tempfile
+import threading
+from urllib.parse import urlparse
+from dotenv import load_dotenv, find_dotenv
+
+load_dotenv(find_dotenv(usecwd=True))
+
+IMAGE_CACHE_DIR = os.environ.get('IMAGE_CACHE_DIR', os.path.join('.cache', 'images'))
+IMAGE_CACHE_MAX_MB = int(os.environ.get('IMAGE_CACHE_MAX_MB', '512'))
+IMAGE_CACHE_ENABLED = os.environ.get('IMAGE_CACHE', '1') != '0'
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def normalize_url(url):
+    """Strip the query string: Instagram CDN signatures and expiry live there, the image identity doesn't"""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+
+
+def atomic_write(path, data):
+    """Write to a temp file in the same directory and rename it into place"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ImageCache:
+    """On-disk cache of model-ready images.
+
+    URL entries (keyed by the normalized URL plus the processing settings)
+    point at blobs stored by the SHA-256 of their content, so the same image
+    served under different URLs is stored once. Entries and blobs are
+    evicted least-recently-used first once the cache grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir=IMAGE_CACHE_DIR, max_bytes=IMAGE_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.entries_dir = os.path.join(cache_dir, "entries")
+        self.blobs_dir = os.path.join(cache_dir, "blobs")
+        self.max_bytes = max_bytes
+        os.makedirs(self.entries_dir, exist_ok=True)
+        os.makedirs(self.blobs_dir, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size = None
+
+    def _entry_path(self, url, variant):
+        key = hashlib.sha256(f"{normalize_url(url)}|{variant}".encode("utf-8")).hexdigest()
+        return os.path.join(self.entries_dir, key[:2], f"{key}.json")
+
+    def _blob_path(self, content_hash):
+        return os.path.join(self.blobs_dir, content_hash[:2], content_hash)
+
+    def get(self, url, variant=""):
+        """Return the cached prepare_image() result for url, or None"""
+        entry_path = self._entry_path(url, variant)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            blob_path = self._blob_path(entry["content_hash"])
+            with open(blob_path, "rb") as f:
+                data = f.read()
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Bump mtimes so LRU eviction sees this entry as recently used
+        now = time.time()
+        for path in (entry_path, blob_path):
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+
+        with self._lock:
+            self.hits += 1
+
+        base64_data = base64.b64encode(data).decode('utf-8')
+        result = dict(entry["metadata"])
+        result.update({
+            "data_uri": f"data:{entry['content_type']};base64,{base64_data}",
+            "base64_data": base64_data,
+            "content_type": entry["content_type"],
+            "content_hash": entry["content_hash"],
+            "cached": True
+        })
+        return result
+
+    def put(self, url, result, variant=""):
+        """Store a prepare_image() result; returns its content hash"""
+        data = base64.b64decode(result["base64_data"])
+        content_hash = hashlib.sha256(data).hexdigest()
+        metadata = {k: v for k, v in result.items() if k not in ("data_uri", "base64_data", "content_type")}
+        entry = {
+            "url": normalize_url(url),
+            "content_hash": content_hash,
+            "content_type": result["content_type"],
+            "metadata": metadata,
+            "stored_at": time.time()
+        }
+        entry_bytes = json.dumps(entry).encode("utf-8")
+
+        added = len(entry_bytes)
+        blob_path = self._blob_path(content_hash)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        if not os.path.exists(blob_path):
+            atomic_write(blob_path, data)
+            added += len(data)
+
+        entry_path = self._entry_path(url, variant)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        atomic_write(entry_path, entry_bytes)
+
+        with self._lock:
+            self.stores += 1
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += added
+            over_budget = self._size > self.max_bytes
+
+        if over_budget:
+            self.evict()
+        return content_hash
+
+    def _list_files(self):
+        files = []
+        for root in (self.entries_dir, self.blobs_dir):
+            for dirpath, _, filenames in os.walk(root):
+                for name in filenames:
+                    if name.startswith(".tmp-"):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._list_files())
+
+    def evict(self):
+        """Delete least-recently-used files until the cache is back under 90% of max_bytes"""
+        files = sorted(self._list_files())
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another worker evicted it first
+                pass
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self._size = total
+            self.evictions += removed
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions
+            }
+
+    def report(self):
+        stats = self.stats()
+        return (f"[Info] - Image cache: {stats['hits']} hits, {stats['misses']} misses "
+                f"({100 * stats['hit_rate']:.0f}% hit rate), {stats['stores']} stored, "
+                f"{stats['evictions']} evicted")
+
+
+def get_image_cache():
+    """Return the shared ImageCache, or None when IMAGE_CACHE=0"""
+    global _default_cache
+    if not IMAGE_CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ImageCache()
+        return _default_cache
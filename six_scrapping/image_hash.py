@@ -0,0 +1,160 @@
+import os
+import math
+import time
+import sqlite3
+import threading
+from PIL import Image
+from dotenv import load_dotenv, find_dotenv
+
+load_dotenv(find_dotenv(usecwd=True))
+
+# Two images whose pHashes differ in at most this many of 64 bits are treated as the same picture
+IMAGE_DEDUPE_DISTANCE = int(os.environ.get('IMAGE_DEDUPE_DISTANCE', '6'))
+IMAGE_DEDUPE_ENABLED = os.environ.get('IMAGE_DEDUPE', '1') != '0'
+# Drop images that this many other users also posted (memes, reposts); 0 turns the cross-user check off
+IMAGE_SHARED_MIN_USERS = int(os.environ.get('IMAGE_SHARED_MIN_USERS', '0'))
+IMAGE_HASH_INDEX_PATH = os.environ.get('IMAGE_HASH_INDEX_PATH', os.path.join('.cache', 'image_hashes.sqlite3'))
+
+HASH_SIZE = 8
+DCT_SIZE = 32
+# Eight 8-bit bands: two hashes within 7 bits differ in at most 7 bands, so they always share one
+BAND_COUNT = 8
+BAND_BITS = 64 // BAND_COUNT
+# Cosine table for the low-frequency rows of a 32-point DCT-II; only the top-left 8x8 is ever used
+_DCT_COS = [[math.cos(math.pi * (2 * x + 1) * u / (2 * DCT_SIZE)) for x in range(DCT_SIZE)] for u in range(HASH_SIZE)]
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def bits_to_hex(bits):
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f"{value:0{len(bits) // 4}x}"
+
+
+def dhash(image):
+    """Difference hash: is each pixel brighter than its right-hand neighbour, on a 9x8 thumbnail"""
+    pixels = list(image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS).getdata())
+    width = HASH_SIZE + 1
+    return bits_to_hex([
+        pixels[row * width + col] > pixels[row * width + col + 1]
+        for row in range(HASH_SIZE) for col in range(HASH_SIZE)
+    ])
+
+
+def phash(image):
+    """Perceptual hash: low-frequency DCT coefficients of a 32x32 thumbnail compared to their median"""
+    pixels = list(image.convert("L").resize((DCT_SIZE, DCT_SIZE), Image.LANCZOS).getdata())
+    rows = [pixels[i * DCT_SIZE:(i + 1) * DCT_SIZE] for i in range(DCT_SIZE)]
+
+    # Separable 2D DCT, keeping only the first HASH_SIZE frequencies in each direction
+    row_coeffs = [[sum(c * p for c, p in zip(_DCT_COS[u], row)) for u in range(HASH_SIZE)] for row in rows]
+    coeffs = [
+        sum(_DCT_COS[v][y] * row_coeffs[y][u] for y in range(DCT_SIZE))
+        for v in range(HASH_SIZE) for u in range(HASH_SIZE)
+    ]
+
+    # The DC term is overall brightness, not structure, so it stays out of the median
+    median = sorted(coeffs[1:])[len(coeffs[1:]) // 2]
+    return bits_to_hex([c > median for c in coeffs])
+
+
+def compute_hashes(image):
+    return {"phash": phash(image), "dhash": dhash(image)}
+
+
+def hamming(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def is_near_duplicate(a, b, max_distance=IMAGE_DEDUPE_DISTANCE):
+    """pHash decides; dHash must roughly agree, which filters out pHash collisions on flat images"""
+    return hamming(a["phash"], b["phash"]) <= max_distance and hamming(a["dhash"], b["dhash"]) <= 2 * max_distance
+
+
+def find_duplicates(hashes, max_distance=IMAGE_DEDUPE_DISTANCE):
+    """Map the index of every near-duplicate in hashes to the index of the earlier image it repeats.
+
+    Entries that are None (no hash available) are never dropped.
+    """
+    kept, duplicates = [], {}
+    for index, image_hashes in enumerate(hashes):
+        if image_hashes is None:
+            continue
+        original = next((k for k in kept if is_near_duplicate(hashes[k], image_hashes, max_distance)), None)
+        if original is None:
+            kept.append(index)
+        else:
+            duplicates[index] = original
+    return duplicates
+
+
+def hash_bands(hex_hash):
+    """BAND_COUNT bands of BAND_BITS bits; two hashes within BAND_COUNT - 1 bits always share at least one band"""
+    value = int(hex_hash, 16)
+    mask = (1 << BAND_BITS) - 1
+    return [(value >> (BAND_BITS * (BAND_COUNT - 1 - i))) & mask for i in range(BAND_COUNT)]
+
+
+class SharedImageIndex:
+    """Which users posted which pHashes, in a local SQLite file, to spot content shared across many users.
+
+    Lookups use the band columns to find candidates, then check the full
+    Hamming distance, so near-identical reposts are matched too. Band lookups
+    only find every match up to BAND_COUNT - 1 bits; larger max_distance
+    values compare against every stored hash instead.
+    """
+
+    def __init__(self, path=IMAGE_HASH_INDEX_PATH, max_distance=IMAGE_DEDUPE_DISTANCE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.bands = [f"band{i}" for i in range(BAND_COUNT)]
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS image_hashes (
+                phash TEXT,
+                owner TEXT,
+                {", ".join(f"{band} INTEGER" for band in self.bands)},
+                seen_at REAL,
+                PRIMARY KEY (phash, owner)
+            )
+        """)
+        for band in self.bands:
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_image_hashes_{band} ON image_hashes ({band})")
+        self.conn.commit()
+
+    def record(self, owner, phashes):
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO image_hashes (phash, owner, {', '.join(self.bands)}, seen_at) "
+                f"VALUES ({', '.join('?' * (BAND_COUNT + 3))})",
+                [(p, owner, *hash_bands(p), now) for p in set(phashes)]
+            )
+            self.conn.commit()
+
+    def other_owners(self, phash_value, owner):
+        """Number of other users who posted something within max_distance of phash_value"""
+        if self.max_distance < BAND_COUNT:
+            where = "(" + " OR ".join(f"{band} = ?" for band in self.bands) + ") AND owner <> ?"
+            params = (*hash_bands(phash_value), owner)
+        else:
+            where, params = "owner <> ?", (owner,)
+        with self._lock:
+            rows = self.conn.execute(f"SELECT phash, owner FROM image_hashes WHERE {where}", params).fetchall()
+        return len({o for p, o in rows if hamming(p, phash_value) <= self.max_distance})
+
+
+def get_shared_index():
+    """Return the shared SharedImageIndex, or None when IMAGE_SHARED_MIN_USERS is 0"""
+    global _default_index
+    if IMAGE_SHARED_MIN_USERS <= 0:
+        return None
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = SharedImageIndex()
+        return _default_index
@@ -0,0 +1,433 @@
+import os
+import base64
+from dotenv import load_dotenv, find_dotenv
+import requests
+from urllib.parse import urlparse
+import io
+from PIL import Image
+import psycopg2
+import sys
+import argparse
+import threading
+import atexit
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from six_scrapping.image_cache import get_image_cache
+from six_scrapping.image_hash import (
+    compute_hashes, find_duplicates, get_shared_index, IMAGE_DEDUPE_ENABLED, IMAGE_SHARED_MIN_USERS
+)
+from six_scrapping.llm_cache import get_llm_cache, cached_completion
+from six_scrapping.caption_signals import extract_caption_signals, compact_captions, is_low_signal, local_interest_tags
+
+load_dotenv(find_dotenv(usecwd=True))
+    
+OPENAI_KEY = os.environ.get('OPENAI_KEY')
+DB_NAME = os.environ.get('DB_NAME', 'instagram')
+DB_USER = os.environ.get('DB_USER', 'postgres')
+DB_PASSWORD = os.environ.get('DB_PASSWORD', 'postgres')
+DB_HOST = os.environ.get('DB_HOST', 'localhost')
+DB_PORT = os.environ.get('DB_PORT', '5432')
+
+SUPPORTED_FORMATS = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
+
+# Image downloads run concurrently over one pooled keep-alive session
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', '16'))
+IMAGE_CONNECT_TIMEOUT = float(os.environ.get('IMAGE_CONNECT_TIMEOUT', '5'))
+IMAGE_READ_TIMEOUT = float(os.environ.get('IMAGE_READ_TIMEOUT', '20'))
+IMAGE_RETRIES = int(os.environ.get('IMAGE_RETRIES', '3'))
+
+# Images are downscaled and re-encoded before upload; see prepare_image
+IMAGE_MAX_EDGE = int(os.environ.get('IMAGE_MAX_EDGE', '1024'))
+IMAGE_JPEG_QUALITY = int(os.environ.get('IMAGE_JPEG_QUALITY', '85'))
+IMAGE_DETAIL = os.environ.get('IMAGE_DETAIL', 'auto')
+
+# Decoding, HEIC conversion and JPEG encoding are CPU-bound, so they run in a
+# process pool. Download threads block once IMAGE_DECODE_QUEUE images are
+# waiting to be decoded, which keeps raw image bytes in memory bounded.
+IMAGE_PROCESSES = int(os.environ.get('IMAGE_PROCESSES', str(os.cpu_count() or 1)))
+IMAGE_DECODE_QUEUE = int(os.environ.get('IMAGE_DECODE_QUEUE', str(2 * max(1, IMAGE_PROCESSES))))
+
+_session = None
+_session_lock = threading.Lock()
+_process_pool = None
+_process_pool_lock = threading.Lock()
+_decode_slots = threading.BoundedSemaphore(IMAGE_DECODE_QUEUE)
+
+def connect_to_db():
+    """Connect to the PostgreSQL database"""
+    try:
+        conn = psycopg2.connect(
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            port=DB_PORT
+        )
+        return conn
+    except Exception as e:
+        print(f"Error connecting to database: {str(e)}")
+        return None
+
+def get_user_data(username):
+    """Get user data including post URLs and captions from the database"""
+    conn = connect_to_db()
+    if not conn:
+        return None, None, None
+    
+    try:
+        cur = conn.cursor()
+        
+        # First get the user's pk
+        cur.execute("SELECT pk FROM user_data WHERE username = %s", (username,))
+        user_pk_result = cur.fetchone()
+        
+        if not user_pk_result:
+            print(f"User '{username}' not found in the database")
+            return None, None, None
+        
+        user_pk = user_pk_result[0]
+        
+        # Get post URLs, captions, and following list
+        cur.execute("SELECT post_urls, captions, following_list FROM user_detail WHERE pk = %s", (user_pk,))
+        result = cur.fetchone()
+        
+        if not result:
+            print(f"No details found for user '{username}'")
+            return None, None, None
+        
+        post_urls = result[0] if result[0] else []
+        captions = result[1] if result[1] else []
+        following_list = result[2] if result[2] else []
+        
+        return post_urls, captions, following_list
+        
+    except Exception as e:
+        print(f"Error querying database: {str(e)}")
+        return None, None, None
+    finally:
+        if conn:
+            conn.close()
+
+def get_http_session():
+    """Return the shared keep-alive session used for all image downloads"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=IMAGE_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET"],
+            )
+            adapter = HTTPAdapter(pool_connections=IMAGE_WORKERS, pool_maxsize=IMAGE_WORKERS, max_retries=retry)
+            session = requests.Session()
+            session.headers.update({"User-Agent": "Mozilla/5.0"})
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+def download_image(url):
+    """Fetch raw image bytes and the reported content type"""
+    parsed_url = urlparse(url)
+    if not parsed_url.netloc or not parsed_url.scheme:
+        return {"error": "Invalid URL format"}
+
+    response = get_http_session().get(url, timeout=(IMAGE_CONNECT_TIMEOUT, IMAGE_READ_TIMEOUT))
+    if response.status_code != 200:
+        return {"error": f"Failed to fetch image: HTTP {response.status_code}"}
+
+    return {
+        "image_data": response.content,
+        "content_type": response.headers.get('Content-Type', '').lower()
+    }
+
+def decode_image(image_data, content_type, url=""):
+    """Decode image bytes into a PIL image, converting HEIC on the way"""
+    if 'heic' in content_type or url.endswith('.heic'):
+        # Only HEIC needs pyheif, so it isn't loaded until one turns up
+        import pyheif
+        heif_file = pyheif.read_heif(image_data)
+        return Image.frombytes(
+            heif_file.mode,
+            heif_file.size,
+            heif_file.data,
+            "raw",
+            heif_file.mode,
+            heif_file.stride,
+        )
+
+    image = Image.open(io.BytesIO(image_data))
+    # load() forces a full decode, so corrupt data fails here rather than at encode time
+    image.load()
+    return image
+
+def downscale_image(image):
+    """Shrink image in place so its longest edge fits IMAGE_MAX_EDGE"""
+    # Low detail is always sampled at 512px by the model, anything bigger is wasted upload
+    max_edge = min(IMAGE_MAX_EDGE, 512) if IMAGE_DETAIL == "low" else IMAGE_MAX_EDGE
+    if max(image.size) > max_edge:
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    return image
+
+def encode_jpeg(image):
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+def prepare_image(image_data, content_type, url=""):
+    """Decode once, downscale to IMAGE_MAX_EDGE and re-encode as JPEG for the vision model"""
+    is_heic = 'heic' in content_type or url.endswith('.heic')
+    if not is_heic and content_type not in SUPPORTED_FORMATS:
+        return {"error": f"Unsupported image format: {content_type}"}
+
+    try:
+        image = decode_image(image_data, content_type, url)
+    except Exception as e:
+        if is_heic:
+            return {"error": f"Failed to convert HEIC: {str(e)}"}
+        return {"error": "Image data is corrupt or invalid"}
+
+    original_size = image.size
+    image = downscale_image(image)
+    # Hashed here, while the image is decoded anyway; the hashes are cached with the image
+    hashes = compute_hashes(image)
+    encoded = encode_jpeg(image)
+    encoded_type = 'image/jpeg'
+
+    # Small, already-compressed originals can come out larger after re-encoding
+    if not is_heic and image.size == original_size and len(image_data) <= len(encoded):
+        encoded = image_data
+        encoded_type = content_type
+
+    base64_data = base64.b64encode(encoded).decode('utf-8')
+    return {
+        "data_uri": f"data:{encoded_type};base64,{base64_data}",
+        "base64_data": base64_data,
+        "content_type": encoded_type,
+        "original_bytes": len(image_data),
+        "encoded_bytes": len(encoded),
+        "size": image.size,
+        "phash": hashes["phash"],
+        "dhash": hashes["dhash"]
+    }
+
+def get_process_pool():
+    """Return the shared process pool for image decoding, or None when IMAGE_PROCESSES is 0"""
+    global _process_pool
+    if IMAGE_PROCESSES <= 0:
+        return None
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn rather than fork: the pool is first used from download threads
+            _process_pool = ProcessPoolExecutor(
+                max_workers=IMAGE_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            atexit.register(_process_pool.shutdown)
+        return _process_pool
+
+def image_cache_variant():
+    """Processing settings are part of the cache key so changing them re-processes images"""
+    return f"{IMAGE_MAX_EDGE}:{IMAGE_JPEG_QUALITY}:{IMAGE_DETAIL}"
+
+def instagram_image_to_base64(url):
+    try:
+        cache = get_image_cache()
+        if cache is not None:
+            cached = cache.get(url, image_cache_variant())
+            if cached is not None:
+                return cached
+
+        downloaded = download_image(url)
+        if "error" in downloaded:
+            return downloaded
+
+        pool = get_process_pool()
+        if pool is None:
+            result = prepare_image(downloaded["image_data"], downloaded["content_type"], url)
+        else:
+            with _decode_slots:
+                future = pool.submit(prepare_image, downloaded["image_data"], downloaded["content_type"], url)
+                result = future.result()
+
+        if cache is not None and "error" not in result:
+            result["content_hash"] = cache.put(url, result, image_cache_variant())
+        return result
+
+    except Exception as e:
+        return {"error": f"Error processing image: {str(e)}"}
+
+def redundant_images(results, owner=None):
+    """Indexes of images not worth sending: near-duplicates of an earlier image and, when owner is
+    given and IMAGE_SHARED_MIN_USERS is set, content that many other users posted as well"""
+    hashes = [None if "error" in result else {"phash": result["phash"], "dhash": result["dhash"]} for result in results]
+
+    duplicates = find_duplicates(hashes) if IMAGE_DEDUPE_ENABLED else {}
+    if duplicates:
+        print(f"[Info] - Dropped {len(duplicates)} near-duplicate images")
+
+    shared = set()
+    index = get_shared_index()
+    if index is not None and owner:
+        for i, h in enumerate(hashes):
+            if h is not None and i not in duplicates and index.other_owners(h["phash"], owner) >= IMAGE_SHARED_MIN_USERS:
+                shared.add(i)
+        index.record(owner, [h["phash"] for h in hashes if h is not None])
+        if shared:
+            print(f"[Info] - Dropped {len(shared)} images shared by {IMAGE_SHARED_MIN_USERS}+ other users")
+
+    return set(duplicates) | shared
+
+def create_content_list(img_urls, captions=None, compact=False, owner=None):
+    """Build image (and caption) content parts.
+
+    With compact=True the raw captions are replaced by one summary of their
+    hashtags, mentions and keywords, appended after the images. Redundant
+    images (see redundant_images) are left out, but their captions are kept.
+    """
+    if captions is None:
+        captions = [None] * len(img_urls)
+
+    posts = list(zip(img_urls, captions))
+
+    # Download every image concurrently; map() keeps results in caption order
+    workers = max(1, min(IMAGE_WORKERS, len(posts)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(instagram_image_to_base64, [url for url, _ in posts]))
+
+    dropped = redundant_images(results, owner)
+
+    content_list=[]
+    original_total, encoded_total = 0, 0
+    for i, ((url, caption), result) in enumerate(zip(posts, results)):
+        if isinstance(result, dict) and "error" in result:
+            print(f"Error processing {url}: {result['error']}")
+            continue
+
+        if i in dropped:
+            if caption and not compact:
+                content_list.append({"type": "text", "text": caption})
+            continue
+
+        original_total += result["original_bytes"]
+        encoded_total += result["encoded_bytes"]
+        print(f"[Info] - Image {result['size'][0]}x{result['size'][1]}: "
+              f"{result['original_bytes'] / 1024:.1f} KB -> {result['encoded_bytes'] / 1024:.1f} KB "
+              f"(saved {(result['original_bytes'] - result['encoded_bytes']) / 1024:.1f} KB)")
+
+        # Append the image
+        content_list.append({
+            "type": "image_url",
+            "image_url": {"url": result["data_uri"], "detail": IMAGE_DETAIL}
+        })
+
+        # If a caption is provided, add it
+        if caption and not compact:
+            content_list.append({
+                "type": "text",
+                "text": caption
+            })
+
+    if original_total:
+        print(f"[Info] - Image payload {original_total / 1024:.1f} KB -> {encoded_total / 1024:.1f} KB "
+              f"({100 * (1 - encoded_total / original_total):.0f}% smaller)")
+
+    cache = get_image_cache()
+    if cache is not None:
+        print(cache.report())
+
+    if compact:
+        content_list.append({
+            "type": "text",
+            "text": compact_captions(extract_caption_signals(captions))
+        })
+
+    return content_list
+
+INTEREST_PROMPT = """
+You are given some data about a person's social media. Based on that you have to predict the interests, hobbies or likings of the person.
+The data is as follows:
+Following List: You can extract the famous personalities, brands, fanpages, etc. the user follows to get interests.
+Posts and Captions: You can get hashtags or keywords from captions and analyse images to get interests.
+Don't be hasty about deciding interests observe if there are any trends.
+
+Return a list of the interests of the person like so:
+["interest1", "interest2", "interest3"]
+
+==
+Following List:
+    """
+
+def build_prompt(following_list):
+    prompt = INTEREST_PROMPT + "\n" + "\n".join(following_list) if following_list else INTEREST_PROMPT + "\n[]"
+    prompt += "\nHere are some posts and their captions uploaded by the person:\n"
+    return prompt
+
+def build_interest_content(img_urls, captions, following_list, compact=False, owner=None):
+    """Build the full message content: prompt with following list, then images and captions"""
+    return [{"type": "text", "text": build_prompt(following_list)}] + create_content_list(
+        img_urls, captions, compact, owner
+    )
+
+def local_tags_if_low_signal(img_urls, captions, following_list):
+    """Interest tags from captions alone for users with too little data for an LLM call.
+
+    None when the user has enough data, or when their captions match nothing in the vocabulary,
+    so the caller falls back to the LLM instead of saving an empty tag list.
+    """
+    if not is_low_signal(img_urls, following_list):
+        return None
+    return local_interest_tags(extract_caption_signals(captions))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Predict a user\'s interests from their posts and following list')
+    parser.add_argument('username', help='Instagram username to analyse')
+    parser.add_argument('--no-cache', action='store_true', help='Always call the API instead of reusing cached responses')
+    parser.add_argument('--caption-prepass', action='store_true',
+                        help='Send a hashtag/keyword summary instead of raw captions, and tag low-signal users locally')
+    args = parser.parse_args(argv)
+
+    username = args.username
+    
+    # Get user data from database
+    img_urls, captions, following_list = get_user_data(username)
+    
+    if not img_urls or not captions:
+        print(f"Could not retrieve data for username '{username}'")
+        sys.exit(1)
+    
+    if args.caption_prepass:
+        local_tags = local_tags_if_low_signal(img_urls, captions, following_list)
+        if local_tags is not None:
+            print("[Info] - Low-signal user, tagged from captions without an LLM call")
+            print(local_tags)
+            return
+
+    from openai import OpenAI
+    client = OpenAI(api_key=OPENAI_KEY)
+
+    content_list = build_interest_content(img_urls, captions, following_list, args.caption_prepass, username)
+    cache = None if args.no_cache else get_llm_cache()
+    response = cached_completion(
+        client,
+        [
+            {
+                "role": "user",
+                "content": content_list
+            }
+        ],
+        model="gpt-4o",
+        cache=cache
+    )
+
+    print(response)
+    if cache is not None:
+        print(cache.report())
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
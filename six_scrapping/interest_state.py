@@ -0,0 +1,70 @@
+from six_scrapping.image_cache import normalize_url
+
+
+def get_user_pk(conn, username):
+    cursor = conn.cursor()
+    cursor.execute("SELECT pk FROM user_data WHERE username = %s", (username,))
+    row = cursor.fetchone()
+    cursor.close()
+    return row[0] if row else None
+
+
+def load_interest_state(conn, user_pk):
+    """Return the stored coverage and result of the last analysis, or None"""
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT covered_posts, covered_following, interests, analyzed_at FROM interest_state WHERE pk = %s",
+        (user_pk,)
+    )
+    row = cursor.fetchone()
+    cursor.close()
+    if not row:
+        return None
+    return {
+        "covered_posts": set(row[0] or []),
+        "covered_following": set(row[1] or []),
+        "interests": row[2] or "",
+        "analyzed_at": row[3]
+    }
+
+
+def compute_delta(state, img_urls, captions, following_list):
+    """Return (new image urls, their captions, new followed accounts) since the stored state.
+
+    Posts are compared by URL without the CDN signature, which changes on
+    every scrape even when the image doesn't.
+    """
+    if state is None:
+        return list(img_urls), list(captions), list(following_list)
+
+    new_urls, new_captions = [], []
+    for url, caption in zip(img_urls, captions):
+        if normalize_url(url) not in state["covered_posts"]:
+            new_urls.append(url)
+            new_captions.append(caption)
+    new_following = [u for u in following_list if u not in state["covered_following"]]
+    return new_urls, new_captions, new_following
+
+
+def save_interest_state(conn, user_pk, state, img_urls, following_list, interests):
+    """Record that the analysis now covers img_urls and following_list on top of what it covered before"""
+    covered_posts = set(state["covered_posts"]) if state else set()
+    covered_following = set(state["covered_following"]) if state else set()
+    covered_posts.update(normalize_url(url) for url in img_urls)
+    covered_following.update(following_list)
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO interest_state (pk, covered_posts, covered_following, interests, analyzed_at) "
+            "VALUES (%s, %s, %s, %s, now()) "
+            "ON CONFLICT (pk) DO UPDATE SET covered_posts = EXCLUDED.covered_posts, "
+            "covered_following = EXCLUDED.covered_following, interests = EXCLUDED.interests, analyzed_at = now()",
+            (user_pk, sorted(covered_posts), sorted(covered_following), interests)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
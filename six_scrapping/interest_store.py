@@ -0,0 +1,232 @@
+import re
+import json
+import argparse
+from psycopg2.extras import execute_values
+from six_scrapping.caption_signals import load_vocab
+
+# JSON schema the model must follow when its answer is written to the database
+INTEREST_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "interests",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "interests": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"type": "string"},
+                            "confidence": {"type": "number"}
+                        },
+                        "required": ["name", "confidence"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["interests"],
+            "additionalProperties": False
+        }
+    }
+}
+
+
+def parse_interest_list(text):
+    """Pull the ["interest1", "interest2"] list out of a model response.
+
+    The prompts ask for a JSON list but the model often wraps it in prose or a
+    code fence, so take the first [...] block and fall back to quoted strings.
+    """
+    if not text:
+        return []
+
+    match = re.search(r"\[.*?\]", text, re.DOTALL)
+    if match:
+        try:
+            values = json.loads(match.group(0))
+            return [str(v).strip() for v in values if str(v).strip()]
+        except ValueError:
+            pass
+
+    return [v.strip() for v in re.findall(r'"([^"]+)"', text) if v.strip()]
+
+
+def parse_structured_interests(text):
+    """Validate a response in INTEREST_RESPONSE_FORMAT and return [(name, confidence), ...].
+
+    Raises ValueError when the response doesn't match the schema.
+    """
+    data = json.loads(text)
+    if not isinstance(data, dict) or not isinstance(data.get("interests"), list):
+        raise ValueError("Response has no 'interests' list")
+
+    interests = []
+    for item in data["interests"]:
+        if not isinstance(item, dict) or not isinstance(item.get("name"), str):
+            raise ValueError(f"Invalid interest entry: {item!r}")
+        confidence = item.get("confidence")
+        if not isinstance(confidence, (int, float)):
+            raise ValueError(f"Invalid confidence for {item['name']!r}")
+        interests.append((item["name"], min(1.0, max(0.0, float(confidence)))))
+    return interests
+
+
+def parse_interests(text, structured=True):
+    """Parse a reply into [(name, confidence)], or None when a structured reply doesn't match the schema.
+
+    A malformed structured reply is rejected rather than read as free text, so
+    nothing half-parsed ever reaches interests/user_interests.
+    """
+    if not structured:
+        return [(name, None) for name in parse_interest_list(text)]
+    try:
+        return parse_structured_interests(text)
+    except (ValueError, TypeError) as e:
+        print(f"[Warning] - Rejected reply that doesn't match the interest schema ({e}): {str(text)[:200]!r}")
+        return None
+
+
+def canonicalize_tag(name):
+    """Lowercase, trim punctuation and map synonyms through the hashtag vocabulary ('Soccer' -> 'football')"""
+    tag = name.strip().lower().lstrip("#").replace("&", " and ")
+    tag = re.sub(r"[^\w\s\-']", " ", tag)
+    tag = re.sub(r"\s+", " ", tag).strip()
+    vocab = load_vocab()
+    return vocab.get(tag, vocab.get(tag.replace(" ", ""), tag))
+
+
+def canonicalize_interests(interests):
+    """Canonicalize [(name, confidence)] and merge duplicates, keeping the highest confidence"""
+    merged = {}
+    for name, confidence in interests:
+        tag = canonicalize_tag(name)
+        if not tag:
+            continue
+        if tag not in merged or (confidence or 0) > (merged[tag] or 0):
+            merged[tag] = confidence
+    return list(merged.items())
+
+
+def save_interest_tags(conn, rows):
+    """Write [(user_pk, interests), ...] to user_detail.interest_tags and the normalized interest tables.
+
+    interests is either a list of names or a list of (name, confidence)
+    pairs. Everything is written in one transaction.
+    """
+    if not rows:
+        return 0
+
+    normalized = []
+    for pk, interests in rows:
+        pairs = [(i, None) if isinstance(i, str) else tuple(i) for i in interests]
+        normalized.append((pk, canonicalize_interests(pairs)))
+
+    cursor = conn.cursor()
+    try:
+        execute_values(
+            cursor,
+            "UPDATE user_detail AS d SET interest_tags = v.tags "
+            "FROM (VALUES %s) AS v(pk, tags) WHERE d.pk = v.pk",
+            [(pk, json.dumps([tag for tag, _ in interests])) for pk, interests in normalized],
+            page_size=len(normalized)
+        )
+        updated = cursor.rowcount
+
+        tags = sorted({tag for _, interests in normalized for tag, _ in interests})
+        interest_ids = {}
+        if tags:
+            execute_values(
+                cursor,
+                "INSERT INTO interests (name) VALUES %s ON CONFLICT (name) DO NOTHING",
+                [(tag,) for tag in tags]
+            )
+            cursor.execute("SELECT name, id FROM interests WHERE name = ANY(%s)", (tags,))
+            interest_ids = dict(cursor.fetchall())
+
+        cursor.execute("DELETE FROM user_interests WHERE user_pk = ANY(%s)", ([pk for pk, _ in normalized],))
+        links = [(pk, interest_ids[tag], confidence) for pk, interests in normalized for tag, confidence in interests]
+        if links:
+            execute_values(
+                cursor,
+                "INSERT INTO user_interests (user_pk, interest_id, confidence) VALUES %s",
+                links
+            )
+
+        conn.commit()
+        return updated
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def users_with_interest(conn, tag, min_confidence=0.0, limit=1000):
+    """Usernames tagged with an interest, most confident first; served from the interest_id index"""
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT u.username, ui.confidence
+        FROM interests i
+        JOIN user_interests ui ON ui.interest_id = i.id
+        JOIN user_data u ON u.pk = ui.user_pk
+        WHERE i.name = %s AND COALESCE(ui.confidence, 1) >= %s
+        ORDER BY ui.confidence DESC NULLS LAST
+        LIMIT %s
+        """,
+        (canonicalize_tag(tag), min_confidence, limit)
+    )
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def parse_account_interests(text):
+    """Pull the {"username": ["interest", ...]} object out of an account classification response"""
+    if not text:
+        return {}
+
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        values = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(values, dict):
+        return {}
+
+    return {
+        str(username).strip().lstrip("@"): [str(v).strip() for v in interests if str(v).strip()]
+        for username, interests in values.items()
+        if isinstance(interests, list)
+    }
+
+
+def main():
+    from six_scrapping.interest import connect_to_db
+
+    parser = argparse.ArgumentParser(description='Query the normalized interest store')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    segment = subparsers.add_parser('segment', help='List users with a given interest')
+    segment.add_argument('interest', help='Interest tag, e.g. hiking')
+    segment.add_argument('--min-confidence', type=float, default=0.0)
+    segment.add_argument('--limit', type=int, default=1000)
+    args = parser.parse_args()
+
+    conn = connect_to_db()
+    if not conn:
+        return
+    try:
+        rows = users_with_interest(conn, args.interest, args.min_confidence, args.limit)
+        for username, confidence in rows:
+            print(f"{username}\t{'' if confidence is None else f'{confidence:.2f}'}")
+        print(f"Total: {len(rows)}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
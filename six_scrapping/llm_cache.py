@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from dotenv import load_dotenv, find_dotenv
+
+load_dotenv(find_dotenv(usecwd=True))
+
+LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH', os.path.join('.cache', 'llm_responses.sqlite3'))
+LLM_CACHE_TTL_DAYS = float(os.environ.get('LLM_CACHE_TTL_DAYS', '30'))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', '50000'))
+LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE', '1') != '0'
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def normalize_content(content):
+    """Replace inline image data with its hash and trim text so the key stays small and stable"""
+    if isinstance(content, str):
+        return content.strip()
+
+    normalized = []
+    for part in content:
+        if part.get("type") == "image_url":
+            url = part["image_url"]["url"]
+            if url.startswith("data:"):
+                url = "sha256:" + hashlib.sha256(url.encode("utf-8")).hexdigest()
+            normalized.append({"type": "image_url", "image_url": dict(part["image_url"], url=url)})
+        elif part.get("type") == "text":
+            normalized.append({"type": "text", "text": part["text"].strip()})
+        else:
+            normalized.append(part)
+    return normalized
+
+
+def cache_key(model, messages, **kwargs):
+    payload = {
+        "model": model,
+        "messages": [dict(m, content=normalize_content(m["content"])) for m in messages],
+        "options": kwargs
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Persistent memo of chat completion responses in a local SQLite file.
+
+    Entries expire after ttl_days; once more than max_entries are stored the
+    least recently used ones are dropped.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, ttl_days=LLM_CACHE_TTL_DAYS, max_entries=LLM_CACHE_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT,
+                created_at REAL,
+                last_used REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+        self.conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, model, response):
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now)
+            )
+            self.conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self.conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.conn.commit()
+
+    def report(self):
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0
+        return f"[Info] - LLM cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
+
+
+def get_llm_cache():
+    """Return the shared LLMCache, or None when LLM_CACHE=0"""
+    global _default_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+        return _default_cache
+
+
+class TruncatedResponseError(ValueError):
+    """The model hit max_tokens before finishing its answer"""
+
+
+def cached_completion(client, messages, model="gpt-4o", cache=None, allow_truncated=True, before_call=None, **kwargs):
+    """Return the completion text for messages, answering from cache when the same request was seen before.
+
+    Replies cut off at max_tokens are never cached; with allow_truncated=False
+    they raise TruncatedResponseError instead of being returned. before_call
+    runs only when the API is actually called, e.g. to wait for a rate limiter.
+    """
+    key = None
+    if cache is not None:
+        key = cache_key(model, messages, **kwargs)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    if before_call is not None:
+        before_call()
+    response = client.chat.completions.create(model=model, messages=messages, **kwargs)
+    content = response.choices[0].message.content
+    truncated = response.choices[0].finish_reason == "length"
+    if truncated and not allow_truncated:
+        raise TruncatedResponseError(f"Response cut off after {response.usage.completion_tokens} tokens")
+
+    if cache is not None and content is not None and not truncated:
+        cache.put(key, model, content)
+    return content
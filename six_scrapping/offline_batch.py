@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import argparse
+from openai import OpenAI
+from dotenv import load_dotenv, find_dotenv
+from six_scrapping.interest import connect_to_db, build_interest_content
+from six_scrapping.interest_store import INTEREST_RESPONSE_FORMAT, parse_interests, save_interest_tags
+from six_scrapping.bulk_interest import PENDING_USERS_QUERY
+
+load_dotenv(find_dotenv(usecwd=True))
+
+OPENAI_KEY = os.environ.get('OPENAI_KEY')
+STATE_FILE = "offline_batch_state.json"
+BATCH_DIR = "batches"
+BATCH_ENDPOINT = "/v1/chat/completions"
+# The Batch API rejects input files over 200 MB, and inline base64 images make requests large
+BATCH_FILE_MAX_BYTES = int(os.environ.get('BATCH_FILE_MAX_MB', '180')) * 1024 * 1024
+
+
+def load_state(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {"batches": {}, "done": []}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_FILE):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def custom_id_for(pk):
+    return f"user-{pk}"
+
+
+def pk_from_custom_id(custom_id):
+    return int(custom_id.split("-", 1)[1])
+
+
+def in_flight_ids(state, include_done=True):
+    """Custom IDs that are already done, compiled but not submitted, or sitting in a batch that hasn't been ingested"""
+    ids = set(state["done"]) if include_done else set()
+    for custom_ids in state.get("compiled", {}).values():
+        ids.update(custom_ids)
+    for batch in state["batches"].values():
+        if not batch.get("ingested"):
+            ids.update(batch["custom_ids"])
+    return ids
+
+
+def compile_batch(state, limit, force=False, model="gpt-4o", max_bytes=BATCH_FILE_MAX_BYTES):
+    """Write one JSONL request per pending user, using the same prompt as interest.py.
+
+    Output is split into files of at most max_bytes; returns their paths.
+    """
+    conn = connect_to_db()
+    if not conn:
+        return []
+
+    # --force re-analyses finished users too, but never queues a user twice. The skip list goes into
+    # the query so LIMIT counts only users that still need a request.
+    skip = [pk_from_custom_id(custom_id) for custom_id in in_flight_ids(state, include_done=not force)]
+    os.makedirs(BATCH_DIR, exist_ok=True)
+    prefix = os.path.join(BATCH_DIR, f"interest_batch_{int(time.time())}")
+    files = []  # [path, custom_ids]
+    f, size = None, 0
+    try:
+        cursor = conn.cursor(name="offline_batch_users")
+        cursor.execute(PENDING_USERS_QUERY, {"force": force, "limit": limit, "skip": skip})
+        for pk, username, post_urls, captions, following_list in cursor:
+            custom_id = custom_id_for(pk)
+            content = build_interest_content(post_urls or [], captions or [], following_list or [], owner=username)
+            request = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": model,
+                    "messages": [{"role": "user", "content": content}],
+                    "response_format": INTEREST_RESPONSE_FORMAT
+                }
+            }
+            line = (json.dumps(request) + "\n").encode("utf-8")
+            if f is None or (size and size + len(line) > max_bytes):
+                if f is not None:
+                    f.close()
+                files.append([f"{prefix}_{len(files) + 1}.jsonl", []])
+                f, size = open(files[-1][0], "wb"), 0
+            f.write(line)
+            size += len(line)
+            files[-1][1].append(custom_id)
+            print(f"[Info] - Compiled request for {username}")
+        cursor.close()
+    finally:
+        if f is not None:
+            f.close()
+        conn.close()
+
+    if not files:
+        print("[Info] - No users need analysis")
+        return []
+
+    compiled = state.setdefault("compiled", {})
+    for path, custom_ids in files:
+        compiled[path] = custom_ids
+        if force:
+            # Otherwise ingest would skip the new answers as already done
+            state["done"] = sorted(set(state["done"]) - set(custom_ids))
+    save_state(state)
+    for path, custom_ids in files:
+        print(f"[Success] - Wrote {len(custom_ids)} requests to {path}")
+    return [path for path, _ in files]
+
+
+def submit_batch(client, state, path):
+    """Upload a compiled JSONL file and start a batch job for it"""
+    custom_ids = state.get("compiled", {}).get(path)
+    if custom_ids is None:
+        print(f"[Error] - {path} was not compiled by this tool")
+        return None
+
+    with open(path, "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h"
+    )
+
+    state["batches"][batch.id] = {
+        "input_path": path,
+        "input_file_id": input_file.id,
+        "custom_ids": custom_ids,
+        "status": batch.status,
+        "ingested": False
+    }
+    del state["compiled"][path]
+    save_state(state)
+    print(f"[Success] - Submitted {len(custom_ids)} requests as batch {batch.id}")
+    return batch.id
+
+
+def refresh_status(client, state):
+    for batch_id, info in state["batches"].items():
+        if info.get("ingested"):
+            continue
+        batch = client.batches.retrieve(batch_id)
+        info["status"] = batch.status
+        info["output_file_id"] = batch.output_file_id
+        info["error_file_id"] = batch.error_file_id
+        counts = batch.request_counts
+        progress = f"{counts.completed}/{counts.total} completed, {counts.failed} failed" if counts else ""
+        print(f"[Info] - Batch {batch_id}: {batch.status} {progress}")
+    save_state(state)
+
+
+def ingest_results(client, state, write_batch=200):
+    """Write finished batch results to interest_tags, skipping custom IDs ingested before"""
+    refresh_status(client, state)
+    conn = connect_to_db()
+    if not conn:
+        return 0
+
+    done = set(state["done"])
+    written = 0
+    try:
+        for batch_id, info in state["batches"].items():
+            if info.get("ingested") or info["status"] not in ("completed", "expired", "cancelled"):
+                continue
+
+            if info.get("output_file_id"):
+                output = client.files.content(info["output_file_id"]).text
+                rows, row_ids = [], []
+                for line in output.splitlines():
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    custom_id = record["custom_id"]
+                    response = record.get("response") or {}
+                    if custom_id in done or response.get("status_code") != 200:
+                        continue
+                    text = response["body"]["choices"][0]["message"]["content"]
+                    interests = parse_interests(text)
+                    if interests is None:
+                        # Not marked done, so it is reported as failed and compiled again
+                        continue
+                    rows.append((pk_from_custom_id(custom_id), interests))
+                    row_ids.append(custom_id)
+
+                    if len(rows) >= write_batch:
+                        written += save_interest_tags(conn, rows)
+                        done.update(row_ids)
+                        state["done"] = sorted(done)
+                        save_state(state)
+                        rows, row_ids = [], []
+
+                if rows:
+                    written += save_interest_tags(conn, rows)
+                    done.update(row_ids)
+
+            # Requests that failed or never ran are not marked done, so the next compile picks them up again
+            failed = [cid for cid in info["custom_ids"] if cid not in done]
+            if failed:
+                print(f"[Warning] - Batch {batch_id}: {len(failed)} requests without results will be recompiled")
+
+            info["ingested"] = True
+            state["done"] = sorted(done)
+            save_state(state)
+            print(f"[Success] - Ingested batch {batch_id}")
+    finally:
+        conn.close()
+
+    print(f"[Info] - Wrote {written} interest_tags")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tag interests for many users through the offline batch API')
+    parser.add_argument('command', choices=['compile', 'submit', 'status', 'ingest'],
+                        help='compile a JSONL file, submit it, check batch status or ingest finished results')
+    parser.add_argument('--file', help='Compiled JSONL file to submit (default: every compiled file not yet submitted)')
+    parser.add_argument('--limit', type=int, default=10000,
+                        help='Maximum users to compile; files are split to stay under BATCH_FILE_MAX_MB')
+    parser.add_argument('--force', action='store_true', help='Include users that already have interest_tags')
+    parser.add_argument('--base-url', help='API base URL, e.g. a local stand-in batch server')
+    args = parser.parse_args()
+
+    state = load_state()
+
+    if args.command == 'compile':
+        compile_batch(state, args.limit, args.force)
+        return
+
+    client = OpenAI(api_key=OPENAI_KEY, base_url=args.base_url)
+
+    if args.command == 'submit':
+        paths = [args.file] if args.file else list(state.get("compiled", {}))
+        if not paths:
+            print("[Info] - Nothing to submit, run compile first")
+        for path in paths:
+            submit_batch(client, state, path)
+    elif args.command == 'status':
+        refresh_status(client, state)
+    elif args.command == 'ingest':
+        ingest_results(client, state)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import os
+import time
+import queue
+import argparse
+import threading
+from random import randint
+from openai import OpenAI
+from dotenv import load_dotenv, find_dotenv
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service as ChromeService
+from webdriver_manager.chrome import ChromeDriverManager
+from six_scrapping import follow_scraper
+from six_scrapping import post_scraper
+from six_scrapping.interest import build_interest_content
+from six_scrapping.profile_meta import is_hidden, save_profiles
+from six_scrapping.recrawl_scheduler import record_scrape, record_spend, scrape_requests
+from six_scrapping.interest_store import INTEREST_RESPONSE_FORMAT, parse_interests, save_interest_tags
+from six_scrapping.llm_cache import get_llm_cache, cached_completion
+
+load_dotenv(find_dotenv(usecwd=True))
+
+OPENAI_KEY = os.environ.get('OPENAI_KEY')
+
+# Marks the end of a queue; each stage forwards one per downstream worker
+DONE = None
+
+
+def start_stage(name, worker_count, fn, in_queue, out_queue=None, downstream_workers=0):
+    """Run fn over in_queue on worker_count threads and push non-None results to out_queue.
+
+    When every worker has seen DONE, DONE is passed on once per downstream
+    worker so the next stage shuts down too. Returns a thread to join on.
+    """
+    def work():
+        while True:
+            item = in_queue.get()
+            if item is DONE:
+                break
+            try:
+                result = fn(item)
+            except Exception as e:
+                print(f"[Error] - {name} failed for {item.get('username')}: {e}")
+                continue
+            if result is not None and out_queue is not None:
+                # Blocks while the next stage is behind: this is the backpressure
+                out_queue.put(result)
+
+    workers = [threading.Thread(target=work, name=f"{name}-{i}", daemon=True) for i in range(worker_count)]
+    for worker in workers:
+        worker.start()
+
+    def close():
+        for worker in workers:
+            worker.join()
+        for _ in range(downstream_workers):
+            out_queue.put(DONE)
+
+    closer = threading.Thread(target=close, name=f"{name}-close", daemon=True)
+    closer.start()
+    return closer
+
+
+def create_bot():
+    options = webdriver.ChromeOptions()
+    mobile_emulation = {
+        "userAgent": "Mozilla/5.0 (Linux; Android 10; SM-G970F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/83.0.4103.106 Mobile Safari/537.36"}
+    options.add_experimental_option("mobileEmulation", mobile_emulation)
+    return webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=options)
+
+
+def parse_count(value):
+    return None if str(value).lower() == 'all' else int(value)
+
+
+def run(args, usernames, credentials):
+    client = OpenAI(api_key=OPENAI_KEY)
+    cache = None if args.no_cache else get_llm_cache()
+    conn = follow_scraper.connect_to_database()
+    if not conn:
+        print("[Error] - One-shot analysis needs the database")
+        return
+
+    # Bounded queues between stages: the browser can't run more than queue_size users ahead of the LLM
+    scraped_queue = queue.Queue(maxsize=args.queue_size)
+    prepared_queue = queue.Queue(maxsize=args.queue_size)
+    results_queue = queue.Queue(maxsize=args.queue_size)
+    started = {}
+    profiles = {}
+    # (user_pk, requests) per scraped user, recorded for the recrawl scheduler once profiles are saved
+    scraped = []
+    db_lock = threading.Lock()
+
+    def scrape_user(bot, username):
+        started[username] = time.perf_counter()
+        posts = post_scraper.scrape_posts(bot, username, args.posts, profiles)
+        if is_hidden(profiles.get(username)):
+            with db_lock:
+                scraped.append((None, scrape_requests(posts)))
+            return None
+        if posts:
+            post_scraper.save_to_database(username, posts)
+        time.sleep(randint(2, 8))
+        followers = follow_scraper.scrape_following(bot, username, 'followers', parse_count(args.followers), profiles)
+        time.sleep(randint(2, 8))
+        following = follow_scraper.scrape_following(bot, username, 'following', parse_count(args.following), profiles)
+
+        with db_lock:
+            user_info = follow_scraper.check_username_exists(conn, username)
+            user_pk = user_info[0] if user_info else follow_scraper.insert_new_user(conn, username)
+            if user_pk:
+                follow_scraper.update_user_lists(conn, user_pk, followers, following)
+            scraped.append((user_pk, scrape_requests(posts, followers, following)))
+        if not user_pk:
+            return None
+
+        print(f"[Info] - Scraped {username} in {time.perf_counter() - started[username]:.0f}s")
+        return {
+            "pk": user_pk,
+            "username": username,
+            "post_urls": [p.get("image_url") for p in posts if p.get("image_url")],
+            "captions": [p.get("caption", "") for p in posts if p.get("image_url")],
+            "following_list": following
+        }
+
+    def browser_worker(usernames_queue):
+        # Selenium drivers aren't thread-safe, so every scrape worker owns one logged-in browser
+        bot = create_bot()
+        try:
+            follow_scraper.login(bot, *credentials)
+            while True:
+                username = usernames_queue.get()
+                if username is DONE:
+                    break
+                try:
+                    user = scrape_user(bot, username)
+                except Exception as e:
+                    print(f"[Error] - Scraping failed for {username}: {e}")
+                    continue
+                if user is not None:
+                    scraped_queue.put(user)
+        finally:
+            bot.quit()
+
+    def prepare(user):
+        content = build_interest_content(user["post_urls"], user["captions"], user["following_list"],
+                                         owner=user["username"])
+        return dict(user, content=content)
+
+    def analyse(user):
+        response = cached_completion(
+            client, [{"role": "user", "content": user["content"]}], "gpt-4o", cache,
+            response_format=INTEREST_RESPONSE_FORMAT
+        )
+        interests = parse_interests(response)
+        if interests is None:
+            # Left untagged so the next run picks it up again
+            return None
+        return {"pk": user["pk"], "username": user["username"], "interests": interests}
+
+    usernames_queue = queue.Queue()
+    for username in usernames:
+        usernames_queue.put(username)
+    for _ in range(args.browsers):
+        usernames_queue.put(DONE)
+
+    browsers = [threading.Thread(target=browser_worker, args=(usernames_queue,), daemon=True)
+                for _ in range(args.browsers)]
+    for browser in browsers:
+        browser.start()
+
+    def close_scrape_stage():
+        for browser in browsers:
+            browser.join()
+        for _ in range(args.prep_workers):
+            scraped_queue.put(DONE)
+    threading.Thread(target=close_scrape_stage, daemon=True).start()
+
+    start_stage("prepare", args.prep_workers, prepare, scraped_queue, prepared_queue, args.llm_workers)
+    start_stage("analyse", args.llm_workers, analyse, prepared_queue, results_queue, 1)
+
+    # Writes happen on this thread, batched, through the shared connection
+    tagged = 0
+    pending = []
+    while True:
+        result = results_queue.get()
+        if result is not DONE:
+            pending.append(result)
+            elapsed = time.perf_counter() - started.get(result["username"], time.perf_counter())
+            print(f"[Success] - {result['username']} tagged in {elapsed:.0f}s: "
+                  f"{[name for name, _ in result['interests']]}")
+        if pending and (result is DONE or len(pending) >= args.write_batch):
+            with db_lock:
+                tagged += save_interest_tags(conn, [(r["pk"], r["interests"]) for r in pending])
+            pending = []
+        if result is DONE:
+            break
+
+    save_profiles(conn, profiles)
+    for user_pk, requests in scraped:
+        if user_pk:
+            record_scrape(conn, user_pk, requests)
+        else:
+            record_spend(conn, requests)
+    conn.close()
+    print(f"[Info] - Tagged {tagged} of {len(usernames)} users")
+    if cache is not None:
+        print(cache.report())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scrape posts and follows, then tag interests, with every user flowing through a pipeline')
+    parser.add_argument('--usernames', help='Comma-separated Instagram usernames (prompted for when omitted)')
+    parser.add_argument('--posts', type=int, default=12, help='Recent posts to scrape per user')
+    parser.add_argument('--followers', default='100', help="Followers to scrape per user, or 'all'")
+    parser.add_argument('--following', default='100', help="Followed accounts to scrape per user, or 'all'")
+    parser.add_argument('--browsers', type=int, default=1, help='Logged-in browsers scraping in parallel')
+    parser.add_argument('--prep-workers', type=int, default=2, help='Users whose images are prepared at the same time')
+    parser.add_argument('--llm-workers', type=int, default=4, help='Concurrent LLM calls')
+    parser.add_argument('--queue-size', type=int, default=4, help='Users buffered between stages')
+    parser.add_argument('--write-batch', type=int, default=10, help='Results written per database round-trip')
+    parser.add_argument('--no-cache', action='store_true', help='Always call the API instead of reusing cached responses')
+    args = parser.parse_args()
+
+    credentials = follow_scraper.load_credentials()
+    if credentials is None:
+        credentials = follow_scraper.prompt_credentials()
+
+    raw_usernames = args.usernames or input("Enter the Instagram usernames you want to analyse (separated by commas): ")
+    usernames = [u.strip() for u in raw_usernames.split(",") if u.strip()]
+
+    start = time.perf_counter()
+    run(args, usernames, credentials)
+    print(f"[Info] - Finished in {time.perf_counter() - start:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,12 @@
 import time
 from random import randint
 import os
+import argparse
 import json
 from datetime import datetime
 import codecs
 import psycopg2
-from dotenv import load_dotenv
+from dotenv import load_dotenv, find_dotenv
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -15,11 +16,13 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.service import Service as ChromeService
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from six_scrapping.profile_meta import read_profile, is_hidden, save_profiles
+from six_scrapping.recrawl_scheduler import record_spend, scrape_requests
 
 
 def load_credentials_from_env():
     """Load Instagram credentials from environment variables"""
-    load_dotenv()
+    load_dotenv(find_dotenv(usecwd=True))
     username = os.getenv("INSTAGRAM_USERNAME")
     password = os.getenv("INSTAGRAM_PASSWORD")
     
@@ -68,10 +71,24 @@ def decode_unicode_string(raw_string):
     except Exception:
         return raw_string  # fallback if decoding fails
 
-def scrape_posts(bot, username, num_posts=3):
-    """Scrape recent posts from a user's profile and extract metadata"""
+def scrape_posts(bot, username, num_posts=3, profiles=None):
+    """Scrape recent posts from a user's profile and extract metadata
+
+    Profile metadata is parsed from the same page load and stored in profiles[username] when a dict is given.
+    """
     bot.get(f'https://www.instagram.com/{username}/')
     time.sleep(3.5)
+
+    profile = read_profile(bot, username, profiles)
+    if is_hidden(profile):
+        print(f"[Info] - {username} is private, skipping posts")
+        return []
+    if profile and profile.get("post_count") is not None:
+        # Without this the scroll loop keeps looking for posts that don't exist
+        num_posts = min(num_posts, profile["post_count"])
+        if num_posts == 0:
+            print(f"[Info] - {username} has no posts")
+            return []
     
     print(f"[Info] - Scraping {num_posts} recent posts for {username}...")
     
@@ -190,7 +207,7 @@ def extract_post_metadata(bot, post_url):
 def connect_to_db():
     """Create a connection to the PostgreSQL database using environment variables"""
     # Load environment variables from .env file
-    load_dotenv()
+    load_dotenv(find_dotenv(usecwd=True))
     
     try:
         conn = psycopg2.connect(
@@ -269,7 +286,8 @@ def save_to_database(username, posts_data):
     finally:
         conn.close()
 
-def scrape():
+def scrape(usernames=None, posts_count=None, save_to_db=None):
+    """Scrape recent posts; anything not passed in is asked for"""
     credentials = load_credentials_from_env()
 
     if credentials is None:
@@ -277,13 +295,16 @@ def scrape():
     else:
         username, password = credentials
 
-    usernames = input("Enter the Instagram usernames you want to scrape (separated by commas): ").split(",")
+    if usernames is None:
+        usernames = input("Enter the Instagram usernames you want to scrape (separated by commas): ").split(",")
     
     # Ask for post count
-    posts_count = int(input("How many recent posts do you want to scrape? "))
+    if posts_count is None:
+        posts_count = int(input("How many recent posts do you want to scrape? "))
     
     # Ask if data should be saved to database
-    save_to_db = input("Do you want to save the data to database? (y/n): ").lower() == 'y'
+    if save_to_db is None:
+        save_to_db = input("Do you want to save the data to database? (y/n): ").lower() == 'y'
 
     options = webdriver.ChromeOptions()
     # options.add_argument('--headless')
@@ -294,9 +315,13 @@ def scrape():
     bot = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()))
     login(bot, username, password)
 
+    profiles = {}
+    # Page loads per user, private and empty profiles included, for the daily scrape budget
+    requests = 0
     for user in usernames:
         user = user.strip()
-        posts = scrape_posts(bot, user, posts_count)
+        posts = scrape_posts(bot, user, posts_count, profiles)
+        requests += scrape_requests(posts)
         
         if save_to_db and posts:
             print(f"[Info] - Saving data for {user} to database...")
@@ -304,7 +329,29 @@ def scrape():
 
     bot.quit()
 
+    if save_to_db:
+        conn = connect_to_db()
+        if conn:
+            save_profiles(conn, profiles)
+            # Posts alone are a partial scrape: it counts against the budget, but only a full crawl
+            # (one_shot.py or the recrawl scheduler) updates scrape_state
+            record_spend(conn, requests)
+            conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scrape recent posts and their metadata from Instagram profiles')
+    parser.add_argument('--usernames', help='Comma-separated usernames to scrape (prompted for when omitted)')
+    parser.add_argument('--posts', type=int, help='Recent posts to scrape per user (prompted for when omitted)')
+    parser.add_argument('--save', dest='save_to_db', action='store_const', const=True,
+                        help='Save the posts to the database')
+    parser.add_argument('--no-save', dest='save_to_db', action='store_const', const=False,
+                        help='Only write the JSON files')
+    args = parser.parse_args(argv)
+
+    usernames = args.usernames.split(",") if args.usernames else None
+    scrape(usernames=usernames, posts_count=args.posts, save_to_db=args.save_to_db)
+
 
 if __name__ == '__main__':
-    TIMEOUT = 15
-    scrape()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,245 @@
+import re
+import json
+import html as html_lib
+from psycopg2.extras import execute_values
+
+# Logged-in profile pages embed the user object as JSON; these are the fields we keep
+JSON_FIELDS = {
+    "full_name": r'"full_name":"((?:[^"\\]|\\.)*)"',
+    "biography": r'"biography":"((?:[^"\\]|\\.)*)"',
+    "external_url": r'"external_url":"((?:[^"\\]|\\.)*)"',
+    "category_name": r'"category_name":"((?:[^"\\]|\\.)*)"',
+    "profile_pic_url": r'"profile_pic_url":"((?:[^"\\]|\\.)*)"',
+    "profile_pic_url_hd": r'"profile_pic_url_hd":"((?:[^"\\]|\\.)*)"',
+    "city_name": r'"city_name":"((?:[^"\\]|\\.)*)"',
+}
+JSON_FLAGS = {
+    "is_private": r'"is_private":(true|false)',
+    "is_verified": r'"is_verified":(true|false)',
+    "is_business": r'"is_business_account":(true|false)',
+}
+JSON_COUNTS = {
+    "follower_count": r'"edge_followed_by":\{"count":(\d+)\}|"follower_count":(\d+)',
+    "following_count": r'"edge_follow":\{"count":(\d+)\}|"following_count":(\d+)',
+    "post_count": r'"edge_owner_to_timeline_media":\{"count":(\d+)|"media_count":(\d+)',
+}
+JSON_COORDS = {
+    "latitude": r'"latitude":(-?\d+(?:\.\d+)?)',
+    "longitude": r'"longitude":(-?\d+(?:\.\d+)?)',
+}
+
+# og:description reads "1,234 Followers, 56 Following, 78 Posts - See Instagram photos and videos from ..."
+OG_COUNTS = re.compile(
+    r'([\d.,]+[KkMm]?)\s+Followers,\s*([\d.,]+[KkMm]?)\s+Following,\s*([\d.,]+[KkMm]?)\s+Posts', re.IGNORECASE
+)
+OG_NAME = re.compile(r'from\s+(.*?)\s+\(@')
+PRIVATE_NOTICE = re.compile(r'This account is private', re.IGNORECASE)
+
+# Rough cost of the scraper's own sleeps, for estimating a job before it starts
+USERS_PER_SCROLL = 12
+SECONDS_PER_SCROLL = 15
+SECONDS_PER_POST = 7
+SECONDS_PER_PROFILE = 5
+
+
+def parse_count(text):
+    """'1,234' -> 1234, '12.5K' -> 12500, '3M' -> 3000000"""
+    if text is None:
+        return None
+    text = text.replace(",", "").strip()
+    multiplier = 1
+    if text[-1:].lower() == "k":
+        multiplier, text = 1000, text[:-1]
+    elif text[-1:].lower() == "m":
+        multiplier, text = 1000000, text[:-1]
+    try:
+        return int(float(text) * multiplier)
+    except ValueError:
+        return None
+
+
+def meta_content(page_html, prop):
+    match = re.search(
+        rf'<meta[^>]+(?:property|name)="{re.escape(prop)}"[^>]+content="([^"]*)"', page_html
+    ) or re.search(
+        rf'<meta[^>]+content="([^"]*)"[^>]+(?:property|name)="{re.escape(prop)}"', page_html
+    )
+    return html_lib.unescape(match.group(1)) if match else None
+
+
+def decode_json_string(raw):
+    try:
+        return json.loads(f'"{raw}"')
+    except ValueError:
+        return raw
+
+
+def nearest_match(pattern, page_html, anchor, window=20000):
+    """The match closest to our own "username" key.
+
+    The page also embeds other users (suggested accounts, the viewer), so
+    taking the first match anywhere could pick up someone else's fields.
+    """
+    if anchor < 0:
+        return None
+    start = max(0, anchor - window)
+    matches = list(re.finditer(pattern, page_html[start:anchor + window]))
+    if not matches:
+        return None
+    return min(matches, key=lambda m: abs(start + m.start() - anchor))
+
+
+def parse_profile_html(page_html, username):
+    """Pull profile metadata out of an already loaded profile page.
+
+    The embedded user JSON is preferred; the og: meta tags are the fallback
+    for counts, name and picture when Instagram serves the page without it.
+    Returns None when the page doesn't look like a profile.
+    """
+    anchor = page_html.find(f'"username":"{username}"')
+
+    profile = {"username": username}
+    for field, pattern in JSON_FIELDS.items():
+        match = nearest_match(pattern, page_html, anchor)
+        profile[field] = decode_json_string(match.group(1)) if match else None
+    for field, pattern in JSON_FLAGS.items():
+        match = nearest_match(pattern, page_html, anchor)
+        profile[field] = match.group(1) == "true" if match else None
+    for field, pattern in JSON_COUNTS.items():
+        match = nearest_match(pattern, page_html, anchor)
+        profile[field] = int(next(g for g in match.groups() if g)) if match else None
+    for field, pattern in JSON_COORDS.items():
+        match = nearest_match(pattern, page_html, anchor)
+        profile[field] = float(match.group(1)) if match else None
+
+    description = meta_content(page_html, "og:description") or meta_content(page_html, "description") or ""
+    counts = OG_COUNTS.search(description)
+    if counts:
+        for field, value in zip(("follower_count", "following_count", "post_count"), counts.groups()):
+            if profile[field] is None:
+                profile[field] = parse_count(value)
+    if profile["full_name"] is None:
+        name = OG_NAME.search(description)
+        profile["full_name"] = name.group(1) if name else None
+    if profile["profile_pic_url"] is None:
+        profile["profile_pic_url"] = meta_content(page_html, "og:image")
+
+    # A private account we don't follow shows a notice instead of posts and list links
+    profile["hidden"] = bool(PRIVATE_NOTICE.search(page_html))
+    if profile["is_private"] is None and profile["hidden"]:
+        profile["is_private"] = True
+
+    if anchor < 0 and not counts:
+        return None
+    return profile
+
+
+def read_profile(bot, username, profiles=None):
+    """Parse the profile page the bot is already on; no extra navigation.
+
+    The result is also stored in profiles[username] when a dict is given,
+    so callers can upsert everything in one go with save_profiles.
+    """
+    try:
+        profile = parse_profile_html(bot.page_source, username)
+    except Exception as e:
+        print(f"[Warning] - Could not read profile metadata for {username}: {e}")
+        return None
+    if profile is None:
+        print(f"[Warning] - No profile metadata found for {username}")
+        return None
+    if profiles is not None:
+        profiles[username] = profile
+    return profile
+
+
+def is_hidden(profile):
+    return bool(profile and profile.get("hidden"))
+
+
+def estimate_scrape_seconds(profile, posts=0, followers=None, following=None):
+    """Estimate how long scraping this profile takes, from its counts and the requested limits.
+
+    followers/following are the per-user limits (None means all); a limit of 0 skips that list.
+    """
+    if profile is None:
+        return None
+    if is_hidden(profile):
+        return SECONDS_PER_PROFILE
+
+    def list_size(limit, total):
+        if limit == 0:
+            return 0
+        total = total or 0
+        return total if limit is None else min(limit, total)
+
+    seconds = SECONDS_PER_PROFILE
+    seconds += SECONDS_PER_POST * min(posts, profile.get("post_count") or 0)
+    for limit, total in ((followers, profile.get("follower_count")), (following, profile.get("following_count"))):
+        size = list_size(limit, total)
+        if size:
+            seconds += SECONDS_PER_PROFILE + SECONDS_PER_SCROLL * (size // USERS_PER_SCROLL + 1)
+    return seconds
+
+
+USER_DATA_COLUMNS = ["full_name", "profile_pic_url", "profile_pic_url_hd", "is_private"]
+USER_DETAIL_COLUMNS = ["follower_count", "following_count", "post_count", "biography", "is_verified", "is_business",
+                       "category_name", "external_url", "city_name", "latitude", "longitude"]
+
+
+def upsert_present(cursor, table, key, columns, rows, returning=None):
+    """Upsert rows (key value, {column: value}) writing only the columns each row actually has.
+
+    Rows are grouped by which columns are not None, so a missing field never
+    inserts an explicit NULL over the column's default or updates an existing
+    value. Returns the RETURNING rows of every group.
+    """
+    groups = {}
+    for key_value, values in rows:
+        present = tuple(c for c in columns if values.get(c) is not None)
+        groups.setdefault(present, []).append((key_value,) + tuple(values[c] for c in present))
+
+    returned = []
+    for present, values in groups.items():
+        if not present and not returning:
+            continue
+        # Updating the key to itself keeps RETURNING working for rows that have nothing new
+        assignments = ", ".join(f"{c} = EXCLUDED.{c}" for c in (present or (key,)))
+        sql = (f"INSERT INTO {table} ({', '.join((key,) + present)}) VALUES %s "
+               f"ON CONFLICT ({key}) DO UPDATE SET {assignments}")
+        if returning:
+            sql += f" RETURNING {returning}"
+        result = execute_values(cursor, sql, values, fetch=bool(returning))
+        if returning:
+            returned.extend(result)
+    return returned
+
+
+def save_profiles(conn, profiles):
+    """Upsert a batch of parsed profiles into user_data and user_detail.
+
+    Fields that could not be parsed are left out, so existing values and
+    column defaults stay as they were. Returns the number of profiles written.
+    """
+    profiles = [p for p in (profiles.values() if isinstance(profiles, dict) else profiles) if p]
+    if not profiles:
+        return 0
+
+    cursor = conn.cursor()
+    try:
+        user_rows = upsert_present(cursor, "user_data", "username", USER_DATA_COLUMNS,
+                                   [(p["username"], p) for p in profiles], returning="pk, username")
+        pks = {username: pk for pk, username in user_rows}
+
+        # Updating these columns doesn't touch the follow lists, so the mutual-follows trigger stays quiet
+        upsert_present(cursor, "user_detail", "pk", USER_DETAIL_COLUMNS,
+                       [(pks[p["username"]], p) for p in profiles if p["username"] in pks])
+        conn.commit()
+        print(f"[Success] - Saved profile metadata for {len(pks)} users")
+        return len(pks)
+    except Exception as e:
+        conn.rollback()
+        print(f"[Error] - Failed to save profile metadata: {e}")
+        return 0
+    finally:
+        cursor.close()
@@ -0,0 +1,357 @@
+import os
+import math
+import time
+import argparse
+from random import randint
+from datetime import datetime, timezone
+import psycopg2
+from dotenv import load_dotenv, find_dotenv
+from tabulate import tabulate
+from six_scrapping.image_cache import normalize_url
+from six_scrapping.profile_meta import USERS_PER_SCROLL
+
+load_dotenv(find_dotenv(usecwd=True))
+
+# Scrape requests (page loads plus list scrolls) we are willing to spend per day, across all scrapers
+RECRAWL_DAILY_BUDGET = int(os.environ.get('RECRAWL_DAILY_BUDGET', '500'))
+# Never recrawl an account sooner than this, however fast it moves
+RECRAWL_MIN_HOURS = float(os.environ.get('RECRAWL_MIN_HOURS', '12'))
+# Change per day assumed for accounts scraped fewer than two times
+RECRAWL_PRIOR_RATE = float(os.environ.get('RECRAWL_PRIOR_RATE', '0.05'))
+# Floor on the change rate, so static accounts still come back eventually
+RECRAWL_MIN_RATE = float(os.environ.get('RECRAWL_MIN_RATE', '0.002'))
+# Weight of the newest observation in the smoothed change rate
+RECRAWL_ALPHA = float(os.environ.get('RECRAWL_ALPHA', '0.3'))
+
+# Accounts that have been scraped at least once, with what the last scrape left in user_detail
+TRACKED_USERS_QUERY = """
+    SELECT u.username, d.pk, d.follower_count, d.following_count, d.post_count,
+           cardinality(d.followers_list), cardinality(d.following_list), d.post_urls,
+           s.last_scraped_at, s.follower_count, s.following_count, s.post_count,
+           s.followers_listed, s.following_listed, s.post_urls, s.change_rate, s.scrape_count
+    FROM user_detail d
+    JOIN user_data u ON u.pk = d.pk
+    LEFT JOIN scrape_state s ON s.pk = d.pk
+    WHERE d.followers_list IS NOT NULL OR d.following_list IS NOT NULL OR d.post_urls IS NOT NULL
+"""
+
+
+def connect_to_db():
+    try:
+        conn = psycopg2.connect(
+            dbname=os.environ.get('DB_NAME', 'instagram'),
+            user=os.environ.get('DB_USER', 'postgres'),
+            password=os.environ.get('DB_PASSWORD', 'postgres'),
+            host=os.environ.get('DB_HOST', 'localhost'),
+            port=os.environ.get('DB_PORT', '5432')
+        )
+        return conn
+    except Exception as e:
+        print(f"[Error] - Database connection failed: {e}")
+        return None
+
+
+def relative_change(new, old):
+    if new is None or old is None:
+        return 0.0
+    return abs(new - old) / max(old, 1)
+
+
+def observed_change(current, previous):
+    """How much an account changed between two scrapes, as a rough fraction.
+
+    Follower/following count moves and list growth count relative to their
+    size; each new post counts as a tenth, capped at a full change.
+    """
+    previous_posts = set(previous["post_urls"] or [])
+    new_posts = sum(1 for url in current["post_urls"] or [] if normalize_url(url) not in previous_posts)
+    if not previous_posts and current["post_count"] is not None and previous["post_count"] is not None:
+        new_posts = max(current["post_count"] - previous["post_count"], 0)
+
+    listed_before = (previous["followers_listed"] or 0) + (previous["following_listed"] or 0)
+    listed_now = (current["followers_listed"] or 0) + (current["following_listed"] or 0)
+    return (
+        relative_change(current["follower_count"], previous["follower_count"])
+        + relative_change(current["following_count"], previous["following_count"])
+        + min(0.1 * new_posts, 1.0)
+        + max(listed_now - listed_before, 0) / max(listed_before, 1)
+    )
+
+
+def read_tracked(conn):
+    """Return one dict per tracked account with its current values and its stored scrape state"""
+    cursor = conn.cursor(name="recrawl_tracked_users")
+    cursor.execute(TRACKED_USERS_QUERY)
+    tracked = []
+    for row in cursor:
+        tracked.append({
+            "username": row[0],
+            "pk": row[1],
+            "current": {
+                "follower_count": row[2], "following_count": row[3], "post_count": row[4],
+                "followers_listed": row[5], "following_listed": row[6], "post_urls": row[7]
+            },
+            "last_scraped_at": row[8],
+            "previous": {
+                "follower_count": row[9], "following_count": row[10], "post_count": row[11],
+                "followers_listed": row[12], "following_listed": row[13], "post_urls": row[14]
+            },
+            "change_rate": row[15],
+            "scrape_count": row[16] or 0
+        })
+    cursor.close()
+    return tracked
+
+
+def scrape_cost(user, posts, followers, following):
+    """Requests needed to recrawl a user: the profile and each post page, plus one scroll per screen of list"""
+    current = user["current"]
+
+    def list_requests(limit, total):
+        if limit == 0:
+            return 0
+        size = total or 0
+        if limit is not None:
+            size = min(limit, size)
+        return 1 + math.ceil(size / USERS_PER_SCROLL)
+
+    post_requests = min(posts, current["post_count"]) if current["post_count"] is not None else posts
+    return (1 + post_requests
+            + list_requests(followers, current["follower_count"])
+            + list_requests(following, current["following_count"]))
+
+
+def plan_recrawl(tracked, budget, posts=12, followers=100, following=100, now=None):
+    """Rank accounts by expected change per request and keep the best ones that fit the budget.
+
+    Expected change is the smoothed change rate times the days since the last
+    scrape. Accounts scraped within RECRAWL_MIN_HOURS are never picked.
+    """
+    now = now or datetime.now(timezone.utc)
+    candidates = []
+    for user in tracked:
+        # Only scrape_state times count: updated_at also moves when interests or profiles are written
+        last = user["last_scraped_at"]
+        days = (now - last).total_seconds() / 86400 if last else None
+        if days is not None and days * 24 < RECRAWL_MIN_HOURS:
+            continue
+
+        rate = user["change_rate"] if user["change_rate"] is not None else RECRAWL_PRIOR_RATE
+        rate = max(rate, RECRAWL_MIN_RATE)
+        # Accounts we have no scrape time for are as stale as they can be
+        expected_change = rate * days if days is not None else float("inf")
+        cost = scrape_cost(user, posts, followers, following)
+        candidates.append(dict(user, days=days, rate=rate, expected_change=expected_change, cost=cost,
+                               priority=expected_change / cost))
+
+    candidates.sort(key=lambda c: c["priority"], reverse=True)
+
+    # Greedy fill: an expensive account that doesn't fit doesn't stop cheaper ones behind it
+    queue, spent = [], 0
+    for candidate in candidates:
+        if spent + candidate["cost"] <= budget:
+            queue.append(candidate)
+            spent += candidate["cost"]
+    return queue, spent, len(candidates)
+
+
+def scrape_requests(posts=None, followers=None, following=None):
+    """Requests a scrape actually made: the profile and each post page, plus one scroll per screen of each
+    list that was scraped (None means the list wasn't)"""
+    requests = 1 + len(posts or [])
+    for listed in (followers, following):
+        if listed is not None:
+            requests += 1 + math.ceil(len(listed) / USERS_PER_SCROLL)
+    return requests
+
+
+def add_spend(cursor, requests):
+    if requests:
+        cursor.execute(
+            "INSERT INTO scrape_budget (day, spent) VALUES (current_date, %s) "
+            "ON CONFLICT (day) DO UPDATE SET spent = scrape_budget.spent + EXCLUDED.spent",
+            (requests,)
+        )
+
+
+def record_spend(conn, requests):
+    """Count requests against today's budget, for scrapes that leave no state behind (hidden profiles,
+    or only posts or only follow lists)"""
+    cursor = conn.cursor()
+    try:
+        add_spend(cursor, requests)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"[Error] - Failed to record {requests} scrape requests: {e}")
+    finally:
+        cursor.close()
+
+
+def spent_today(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT spent FROM scrape_budget WHERE day = current_date")
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    finally:
+        cursor.close()
+
+
+def record_scrape(conn, user_pk, requests=0):
+    """Compare user_detail with the stored state after a scrape and update the smoothed change rate.
+
+    requests (see scrape_requests) are added to today's spend in the same transaction.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT d.follower_count, d.following_count, d.post_count, cardinality(d.followers_list), "
+            "cardinality(d.following_list), d.post_urls, s.last_scraped_at, s.follower_count, s.following_count, "
+            "s.post_count, s.followers_listed, s.following_listed, s.post_urls, s.change_rate "
+            "FROM user_detail d LEFT JOIN scrape_state s ON s.pk = d.pk WHERE d.pk = %s",
+            (user_pk,)
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        keys = ("follower_count", "following_count", "post_count", "followers_listed", "following_listed", "post_urls")
+        current = dict(zip(keys, row[0:6]))
+        previous = dict(zip(keys, row[7:13]))
+        last_scraped_at, rate = row[6], row[13]
+
+        if last_scraped_at is not None:
+            days = max((datetime.now(timezone.utc) - last_scraped_at).total_seconds() / 86400, 1 / 24)
+            observed_rate = observed_change(current, previous) / days
+            rate = observed_rate if rate is None else RECRAWL_ALPHA * observed_rate + (1 - RECRAWL_ALPHA) * rate
+
+        cursor.execute(
+            "INSERT INTO scrape_state (pk, last_scraped_at, follower_count, following_count, post_count, "
+            "followers_listed, following_listed, post_urls, change_rate, scrape_count) "
+            "VALUES (%s, now(), %s, %s, %s, %s, %s, %s, %s, 1) "
+            "ON CONFLICT (pk) DO UPDATE SET last_scraped_at = now(), follower_count = EXCLUDED.follower_count, "
+            "following_count = EXCLUDED.following_count, post_count = EXCLUDED.post_count, "
+            "followers_listed = EXCLUDED.followers_listed, following_listed = EXCLUDED.following_listed, "
+            "post_urls = EXCLUDED.post_urls, change_rate = EXCLUDED.change_rate, "
+            "scrape_count = scrape_state.scrape_count + 1",
+            (user_pk, current["follower_count"], current["following_count"], current["post_count"],
+             current["followers_listed"], current["following_listed"],
+             [normalize_url(url) for url in current["post_urls"] or []], rate)
+        )
+        add_spend(cursor, requests)
+        conn.commit()
+        return rate
+    except Exception as e:
+        conn.rollback()
+        print(f"[Error] - Failed to record scrape state for {user_pk}: {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def print_plan(queue, spent, candidates, budget):
+    rows = []
+    for user in queue:
+        days = f"{user['days']:.1f}" if user["days"] is not None else "never"
+        rows.append([user["username"], days, f"{user['rate']:.3f}", f"{user['expected_change']:.2f}",
+                     user["cost"], f"{user['priority']:.4f}"])
+    print(tabulate(rows, headers=["Username", "Days since scrape", "Change/day", "Expected change",
+                                  "Requests", "Priority"], tablefmt="pretty"))
+    print(f"[Info] - {len(queue)} of {candidates} due accounts fit in {spent}/{budget} requests")
+
+
+def run_queue(conn, queue, posts, followers, following):
+    """Recrawl the planned accounts with the existing scrapers, recording each one as it finishes"""
+    from six_scrapping import follow_scraper
+    from six_scrapping import post_scraper
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from webdriver_manager.chrome import ChromeDriverManager
+    from six_scrapping.profile_meta import is_hidden, save_profiles
+
+    credentials = follow_scraper.load_credentials() or follow_scraper.prompt_credentials()
+
+    options = webdriver.ChromeOptions()
+    mobile_emulation = {
+        "userAgent": "Mozilla/5.0 (Linux; Android 10; SM-G970F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/83.0.4103.106 Mobile Safari/537.36"}
+    options.add_experimental_option("mobileEmulation", mobile_emulation)
+    bot = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=options)
+    follow_scraper.login(bot, *credentials)
+
+    try:
+        for index, user in enumerate(queue, 1):
+            username, user_pk = user["username"], user["pk"]
+            print(f"[Info] - Recrawling {username} ({index}/{len(queue)})")
+            profiles = {}
+            scraped_posts, follower_list, following_list = None, None, None
+            try:
+                if posts:
+                    scraped_posts = post_scraper.scrape_posts(bot, username, posts, profiles)
+                    if scraped_posts:
+                        post_scraper.save_to_database(username, scraped_posts)
+                    time.sleep(randint(2, 8))
+                if not is_hidden(profiles.get(username)):
+                    follower_list = follow_scraper.scrape_following(bot, username, 'followers', followers, profiles) \
+                        if followers != 0 else None
+                    time.sleep(randint(2, 8))
+                    following_list = follow_scraper.scrape_following(bot, username, 'following', following, profiles) \
+                        if following != 0 else None
+                    if follower_list or following_list:
+                        follow_scraper.update_user_lists(conn, user_pk, follower_list or [], following_list or [])
+                save_profiles(conn, profiles)
+            except Exception as e:
+                print(f"[Error] - Recrawl failed for {username}: {e}")
+                record_spend(conn, scrape_requests(scraped_posts, follower_list, following_list))
+                continue
+
+            rate = record_scrape(conn, user_pk, scrape_requests(scraped_posts, follower_list, following_list))
+            if rate is not None:
+                print(f"[Info] - {username} now changes about {rate:.3f} per day")
+    finally:
+        bot.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plan recrawls of tracked accounts by how fast they change, within a daily request budget')
+    parser.add_argument('command', choices=['plan', 'run', 'record'],
+                        help='show the recrawl queue, scrape it, or record a scrape made by hand')
+    parser.add_argument('usernames', nargs='*', help='Accounts to record (record only)')
+    parser.add_argument('--budget', type=int, default=RECRAWL_DAILY_BUDGET,
+                        help="Scrape requests per day; what any scraper already spent today is subtracted")
+    parser.add_argument('--posts', type=int, default=12, help='Recent posts to scrape per account')
+    parser.add_argument('--followers', type=int, default=100, help='Followers to scrape per account, 0 to skip')
+    parser.add_argument('--following', type=int, default=100, help='Followed accounts to scrape per account, 0 to skip')
+    args = parser.parse_args()
+
+    conn = connect_to_db()
+    if not conn:
+        return
+
+    try:
+        if args.command == 'record':
+            cursor = conn.cursor()
+            cursor.execute("SELECT pk, username FROM user_data WHERE username = ANY(%s)", (args.usernames,))
+            for user_pk, username in cursor.fetchall():
+                rate = record_scrape(conn, user_pk)
+                if rate is not None:
+                    print(f"[Success] - Recorded scrape of {username} ({rate:.3f} change per day)")
+                else:
+                    print(f"[Success] - Recorded first scrape of {username}")
+            cursor.close()
+            return
+
+        already_spent = spent_today(conn)
+        remaining = max(args.budget - already_spent, 0)
+        print(f"[Info] - {already_spent} of {args.budget} requests already spent today")
+        queue, spent, candidates = plan_recrawl(read_tracked(conn), remaining,
+                                                args.posts, args.followers, args.following)
+        print_plan(queue, spent, candidates, remaining)
+        if args.command == 'run' and queue:
+            run_queue(conn, queue, args.posts, args.followers, args.following)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import os
+import math
+from dotenv import load_dotenv, find_dotenv
+
+load_dotenv(find_dotenv(usecwd=True))
+
+# Upper bound on the prompt size of a single following-list call
+PROMPT_TOKEN_BUDGET = int(os.environ.get('PROMPT_TOKEN_BUDGET', '16000'))
+
+_encodings = {}
+
+
+def get_encoding(model):
+    """Return a tiktoken encoding for model, or None when tiktoken isn't installed or can't load it"""
+    if model not in _encodings:
+        try:
+            import tiktoken
+        except ImportError:
+            _encodings[model] = None
+            return None
+        try:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            # tiktoken downloads its BPE files on first use, which fails on offline hosts
+            print(f"[Warning] - Could not load a tokenizer for {model}, estimating tokens from length: {e}")
+            _encodings[model] = None
+    return _encodings[model]
+
+
+def count_tokens(text, model="gpt-4o"):
+    """Count prompt tokens locally; falls back to ~4 characters per token without tiktoken"""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text))
+
+
+def pack_by_token_budget(items, budget=PROMPT_TOKEN_BUDGET, overhead_tokens=0, model="gpt-4o", max_items=None):
+    """Split items into batches whose newline-joined text plus overhead_tokens fits in budget,
+    with at most max_items per batch when it is set.
+
+    An item that doesn't fit on its own still gets a batch of one rather than
+    being dropped.
+    """
+    available = max(1, budget - overhead_tokens)
+    batch, batch_tokens = [], 0
+    for item in items:
+        # +1 for the newline separator between usernames
+        item_tokens = count_tokens(item, model) + 1
+        if batch and (batch_tokens + item_tokens > available or (max_items and len(batch) >= max_items)):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += item_tokens
+    if batch:
+        yield batch
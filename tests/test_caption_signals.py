@@ -0,0 +1,15 @@
+from six_scrapping.caption_signals import extract_caption_signals, local_interest_tags
+
+VOCAB = {"hiking": "hiking", "trail": "hiking", "football": "football"}
+
+
+def test_local_interest_tags_from_matching_captions():
+    signals = extract_caption_signals(["Sunday on the trail #hiking", "#football tonight"], vocab=VOCAB)
+    assert local_interest_tags(signals) == ["hiking", "football"]
+
+
+def test_local_interest_tags_is_none_without_vocabulary_hits():
+    # No match must not look like a result, or the user would be saved with no tags and never sent to the LLM
+    signals = extract_caption_signals(["Brunch with the girls #sundayfunday", "new haircut"], vocab=VOCAB)
+    assert signals["candidates"] == []
+    assert local_interest_tags(signals) is None